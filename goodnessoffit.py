@@ -8,55 +8,199 @@ attendance, parental involvement, and other aspects influencing academic success
 '''
 
 # Import all the libraries
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 import statsmodels.api as sm
-from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import Ridge
 
-#Import csv file downloaded from Kaggle.
-data = pd.read_csv('StudentPerformanceFactors.csv')
-
 #Response variable is the variable that is being predicted. Also known as outcome variable.
 response = 'Exam_Score'
 
 #Predictor variable is the variable used to predict the response variable. Also known as independent variable.
 predictor = ['Hours_Studied','Attendance','Sleep_Hours','Previous_Scores','Tutoring_Sessions','Physical_Activity']
 
+#All of the used columns are small integer counts and scores, so int16 is enough.
+column_dtypes = {column: np.int16 for column in [response] + predictor}
+
+#Import csv file downloaded from Kaggle, only when it is first needed.
+#Only the response and predictor columns are parsed, and they are cached column by column in an .npz file
+#keyed on the csv's size and modification time, so later runs skip csv parsing entirely.
+#If the cache cannot be written, the parsed columns are returned without it.
+_loaded = {}
+def load_data(path='StudentPerformanceFactors.csv'):
+    if path in _loaded:
+        return _loaded[path]
+    cache_path = path + '.npz'
+    source_stat = os.stat(path)
+    fingerprint = np.array([source_stat.st_size, source_stat.st_mtime_ns], dtype=np.int64)
+
+    input_Data = None
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cache:
+            if np.array_equal(cache['_source'], fingerprint) and set(column_dtypes) <= set(cache.files):
+                input_Data = pd.DataFrame({column: cache[column] for column in column_dtypes})
+    if input_Data is None:
+        input_Data = pd.read_csv(path, usecols=list(column_dtypes), dtype=column_dtypes)[list(column_dtypes)]
+        try:
+            with open(cache_path + '.tmp', 'wb') as f:
+                np.savez(f, _source=fingerprint, **{column: input_Data[column].to_numpy() for column in column_dtypes})
+            os.replace(cache_path + '.tmp', cache_path)
+        except OSError:
+            #The cache cannot be written (e.g. a read-only data directory), so the parsed data is used without it
+            if os.path.exists(cache_path + '.tmp'):
+                try:
+                    os.remove(cache_path + '.tmp')
+                except OSError:
+                    pass
+
+    _loaded[path] = input_Data
+    return input_Data
+
+#Running count, null count, mean, min, max and central moments (M2, M3, M4) of every numeric column.
+#Each chunk is summarized in one pass and folded in with the pairwise update formulas
+#(Chan et al. / Terriberry), which are numerically stable and let accumulators built on
+#different chunks or processes be merged exactly.
+class Moments:
+    def __init__(self, columns):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.count = np.zeros(size)
+        self.nulls = np.zeros(size, dtype=np.int64)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.m3 = np.zeros(size)
+        self.m4 = np.zeros(size)
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+
+    @classmethod
+    def from_frame(cls, input_Data):
+        return cls(input_Data.columns).update(input_Data)
+
+    def update(self, input_Data):
+        values = input_Data[self.columns].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        chunk = Moments(self.columns)
+        chunk.count = present.sum(axis=0).astype(float)
+        chunk.nulls = len(values) - chunk.count.astype(np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            chunk.mean = np.where(present, values, 0).sum(axis=0) / chunk.count
+        chunk.mean = np.nan_to_num(chunk.mean)
+        deviation = np.where(present, values - chunk.mean, 0)
+        chunk.m2 = (deviation**2).sum(axis=0)
+        chunk.m3 = (deviation**3).sum(axis=0)
+        chunk.m4 = (deviation**4).sum(axis=0)
+        chunk.min = np.where(present, values, np.inf).min(axis=0, initial=np.inf)
+        chunk.max = np.where(present, values, -np.inf).max(axis=0, initial=-np.inf)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        na, nb = self.count, other.count
+        n = na + nb
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = other.mean - self.mean
+            mean = np.where(n > 0, self.mean + delta * nb / n, 0)
+            m2 = self.m2 + other.m2 + delta**2 * na * nb / n
+            m3 = (self.m3 + other.m3 + delta**3 * na * nb * (na - nb) / n**2
+                  + 3 * delta * (na * other.m2 - nb * self.m2) / n)
+            m4 = (self.m4 + other.m4 + delta**4 * na * nb * (na**2 - na * nb + nb**2) / n**3
+                  + 6 * delta**2 * (na**2 * other.m2 + nb**2 * self.m2) / n**2
+                  + 4 * delta * (na * other.m3 - nb * self.m3) / n)
+        empty = n == 0
+        self.mean = mean
+        self.m2, self.m3, self.m4 = (np.where(empty, 0, m) for m in (m2, m3, m4))
+        self.count = n
+        self.nulls = self.nulls + other.nulls
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    #Same definitions as pandas: sample std, adjusted skewness and unbiased excess kurtosis.
+    def summary(self):
+        n = self.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.where(n > 1, np.sqrt(self.m2 / (n - 1)), np.nan)
+            g1 = np.sqrt(n) * self.m3 / self.m2**1.5
+            skew = np.where(n < 3, np.nan, np.where(self.m2 == 0, 0, np.sqrt(n * (n - 1)) / (n - 2) * g1))
+            g2 = n * self.m4 / self.m2**2 - 3
+            kurt = np.where(n < 4, np.nan, np.where(self.m2 == 0, 0, ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))))
+        return pd.DataFrame({
+            'count': n, 'nulls': self.nulls, 'mean': np.where(n > 0, self.mean, np.nan), 'std': std,
+            'min': np.where(n > 0, self.min, np.nan), 'max': np.where(n > 0, self.max, np.nan),
+            'skew': skew, 'kurt': kurt,
+        }, index=self.columns).T
+
+#Moments of one csv file (or partition of a file), read chunk by chunk.
+def file_moments(path,columns,chunksize=100_000):
+    moments = Moments(columns)
+    for chunk in pd.read_csv(path, usecols=list(columns), chunksize=chunksize):
+        moments.update(chunk)
+    return moments
+
+#Moments of a file partitioned into several csv files, one worker per partition, merged at the end.
+def partitioned_moments(paths,columns,chunksize=100_000,n_workers=None):
+    moments = Moments(columns)
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        for partition in pool.map(file_moments, paths, [columns] * len(paths), [chunksize] * len(paths)):
+            moments.merge(partition)
+    return moments
+
 #Seeing dimensions, data types,and missing values in StudentPerformanceFactors dataset.
-def structure(input_Data):
+#Null counts of numeric columns come from the moments when they are given, so those columns are not rescanned.
+def structure(input_Data,moments=None):
     print("Data Structure")
     print("---------------")
     print(f"Dimensions: {input_Data.shape}")
     print(f"Data Types:\n{input_Data.dtypes}")
-    print(f"Missing Values:\n{input_Data.isnull().sum()}")
+    if moments is None:
+        missing = input_Data.isnull().sum()
+    else:
+        other_columns = [column for column in input_Data.columns if column not in moments.columns]
+        missing = pd.concat([pd.Series(moments.nulls, index=moments.columns), input_Data[other_columns].isnull().sum()])
+        missing = missing[input_Data.columns].astype(np.int64)
+    print(f"Missing Values:\n{missing}")
 
-structure(data)
+if __name__ == '__main__':
+    data = load_data()
+    data_moments = Moments.from_frame(data.select_dtypes(include=[np.number]))
+    structure(data, data_moments)
 '''
 Interpretation
-There are 6607 rows and 20 different variables.
-There are missing values from teacher quality, parental education level, and distance from home columns. 
-Since we will focus more on the numeric values, we will skip the steps like dropping the rows or filling in the gaps.
+There are 6607 rows. Only the response and the six predictor columns are loaded (7 int16 columns),
+out of the 20 variables in the csv.
+None of the loaded columns have missing values. The missing values in the csv are in teacher quality,
+parental education level, and distance from home, which are not loaded, so we skip steps like dropping
+the rows or filling in the gaps.
 '''
 
 
 #Before starting any analysis or transforming the data, look at the descriptive statistics.
-def descr(input_Data):
+#Everything except the median comes from a single pass of the moment accumulator (or from moments passed in,
+#e.g. merged over the partitions of a larger file).
+def descr(input_Data,moments=None):
     print("\nDescriptive Statistics")
     print("----------------------")
     numeric_columns = input_Data.select_dtypes(include=[np.number]).columns
+    if moments is None:
+        moments = Moments.from_frame(input_Data[numeric_columns])
+    summary = moments.summary()
     print("Central Tendency Measures:")
-    print(input_Data[numeric_columns].describe().loc[['mean', '50%']])
+    central = summary.loc[['mean']]
+    central.loc['50%'] = input_Data[moments.columns].median()
+    print(central)
     print("\nDispersion Measures:")
-    print(input_Data[numeric_columns].describe().loc[['std', 'min', 'max']])
+    print(summary.loc[['std', 'min', 'max']])
 
     # Check for distribution normality (skewness and kurtosis)
     print("\nDistribution Measures:")
     print("------------------------")
-    print(input_Data[numeric_columns].skew())
-    print(input_Data[numeric_columns].kurt())
+    print(summary.loc['skew'])
+    print(summary.loc['kurt'])
 
-descr(data)
+if __name__ == '__main__':
+    descr(data, data_moments)
 
 '''
 Interpretation
@@ -67,26 +211,85 @@ The skewness of 1.64 indicates a right-skewed distribution, while the kurtosis o
 Columns such as hours studied, attendance, sleep hours, previous scores, and physical activity are close to a normal distribution.
 '''
 
-def standardize(input_Data):
+#Z score standardization without intermediate copies: the numeric columns are copied once into a single
+#column-major float array (float64, or float32 to halve memory), standardized in place column by column,
+#and wrapped in a DataFrame that shares the array. Same result as StandardScaler; the means and scales are
+#kept in attrs for inverse transforms.
+def standardize(input_Data,dtype=np.float64):
     numeric_columns = input_Data.select_dtypes(include=[np.number]).columns
-    scaler = StandardScaler()
-    scaled_data = scaler.fit_transform(input_Data[numeric_columns])
+    values = np.empty((len(input_Data), len(numeric_columns)), dtype=dtype, order='F')
+    for j, column in enumerate(numeric_columns):
+        values[:, j] = input_Data[column].to_numpy()
+    means, scales = standardize_inplace(values)
 
 #Back to DF for readibility and using pandas features
-    scaled_df = pd.DataFrame(scaled_data, columns=numeric_columns)
+    scaled_df = pd.DataFrame(values, columns=numeric_columns, copy=False)
+    scaled_df.attrs['means'] = pd.Series(means, index=numeric_columns)
+    scaled_df.attrs['scales'] = pd.Series(scales, index=numeric_columns)
     return scaled_df
 
-def Linear(input_Data,response_input,predictor_input):
-    #Define response variable
-    y= input_Data[response_input]
-    
+#Standardize a 2D float array in place, one column at a time, so the only temporary is one column.
+#Statistics are accumulated in float64 even for float32 data. Constant columns keep a scale of 1, like StandardScaler.
+def standardize_inplace(values):
+    n = values.shape[0]
+    means = np.empty(values.shape[1])
+    scales = np.empty(values.shape[1])
+    for j in range(values.shape[1]):
+        column = values[:, j]
+        means[j] = column.mean(dtype=np.float64)
+        column -= means[j]
+        scales[j] = np.sqrt(np.square(column, dtype=np.float64).sum() / n)
+        if scales[j] == 0:
+            scales[j] = 1
+        column /= scales[j]
+    return means, scales
+
+#Undo standardize, using the means and scales it kept (one new array, updated in place).
+def unstandardize(scaled_df):
+    values = scaled_df.to_numpy() * scaled_df.attrs['scales'].to_numpy()
+    values += scaled_df.attrs['means'].to_numpy()
+    return pd.DataFrame(values, columns=scaled_df.columns, copy=False)
+
+#The design matrix (constant + predictors) is the only copy: each used column is read as a view of the input
+#(the DataFrame from standardize shares its array, or a 2D array such as the one standardize_inplace works on,
+#with its column names in columns) and written straight into it. Other columns (e.g. strings) are never converted.
+#With a list of response columns, all of them are solved against one QR factorization of the design
+#(a matrix right-hand side), and a DataFrame of r^2, AIC and BIC per response is returned instead of one model.
+def Linear(input_Data,response_input,predictor_input,columns=None):
+    responses = [response_input] if isinstance(response_input, str) else list(response_input)
+    names = responses + list(predictor_input)
+    if isinstance(input_Data, np.ndarray):
+        column_index = {name: j for j, name in enumerate(columns)}
+        used = [input_Data[:, column_index[name]] for name in names]
+    else:
+        used = [input_Data[name].to_numpy() for name in names]
+    #Float data keeps its dtype (e.g. float32 from standardize), anything else is fitted in float64
+    dtype = np.result_type(*used)
+    dtype = dtype if dtype.kind == 'f' else np.float64
+    n = len(used[0])
+
     #Define predictor variables
-    x= input_Data[predictor_input]
-    x= sm.add_constant(x)
+    x= np.empty((n, len(predictor_input) + 1), dtype=dtype)
+    x[:, 0] = 1
+    for j, values in enumerate(used[len(responses):]):
+        x[:, j + 1] = values
 
-    #fit regression model
-    model1 = sm.OLS(y, x).fit()
-    return model1
+    if isinstance(response_input, str):
+        #fit regression model, keeping the column names in params and summary()
+        y = pd.Series(used[0].astype(dtype, copy=False), name=response_input, copy=False)
+        model1 = sm.OLS(y, pd.DataFrame(x, columns=['const', *predictor_input], copy=False)).fit()
+        return model1
+
+    #Define response variables and fit every response at once
+    y= np.empty((n, len(responses)), dtype=dtype)
+    for j, values in enumerate(used[:len(responses)]):
+        y[:, j] = values
+    q, r = np.linalg.qr(x)
+    coef = np.linalg.solve(r, q.T @ y)
+    residuals = y - x @ coef
+    rss = np.sum(residuals**2, axis=0)
+    tss = np.sum((y - y.mean(axis=0))**2, axis=0)
+    return pd.DataFrame(fit_measures(rss, tss, len(y), len(predictor_input)), index=pd.Index(response_input, name='response'))
 '''
 Data Transformation
 
@@ -98,8 +301,9 @@ As we removed all the outliers from previous steps, we will go with Z score stan
 '''
 
 #Standardize data
-inputdata = standardize(data)
-fitted_model1 = Linear(inputdata, response, predictor)
+if __name__ == '__main__':
+    inputdata = standardize(data)
+    fitted_model1 = Linear(inputdata, response, predictor)
 
 
 # View r squared, AIC, BIC models.
@@ -112,9 +316,10 @@ def AIC(model):
 def BIC(model):
     print(f"BIC of the linear model: {model.bic}")
 
-r2(fitted_model1)
-AIC(fitted_model1)
-BIC(fitted_model1)
+if __name__ == '__main__':
+    r2(fitted_model1)
+    AIC(fitted_model1)
+    BIC(fitted_model1)
 '''
 r^2 of the linear model: 0.598249632840968
 AIC of the linear model: 12738.769528169923
@@ -133,4 +338,217 @@ Lower AIC value is a better model in terms of the trade-off between fit and comp
 #### BIC (Bayesian Information Criterion)
 BIC is similar to AIC but applies a stricter penalty for model complexity. BIC value of 12786 suggests this model (when adjusted for complexity), fits the data fairly well. 
 It is best used for model comparison.
-'''
\ No newline at end of file
+'''
+#Centered cross-product (Gram) matrix of the predictors and the response, built once from the rows.
+#The last row/column belongs to the response. Every subset fit below is read off this matrix.
+def gram(input_Data,response_input,predictor_input):
+    values = input_Data[list(predictor_input) + [response_input]].to_numpy(dtype=float)
+    values = values - values.mean(axis=0)
+    return values.T @ values, len(values)
+
+#Sweep operator on pivot k, in place. Sweeping a pivot twice restores the matrix,
+#so adding or dropping one predictor from the current model costs O(p^2).
+def sweep(matrix,k):
+    pivot = matrix[k, k]
+    row = matrix[k].copy()
+    matrix -= np.outer(row, row) / pivot
+    matrix[k] = row / pivot
+    matrix[:, k] = row / pivot
+    matrix[k, k] = -1 / pivot
+
+#Goodness of fit for a model with intercept + n_predictors, with the same log-likelihood, AIC and BIC as statsmodels OLS.
+def fit_measures(rss,tss,n,n_predictors):
+    n_params = n_predictors + 1
+    llf = -n / 2 * (np.log(2 * np.pi) + np.log(rss / n) + 1)
+    return {'rsquared': 1 - rss / tss, 'aic': -2 * llf + 2 * n_params, 'bic': -2 * llf + np.log(n) * n_params}
+
+#Residual sum of squares of one subset, solved directly from the Gram matrix.
+def subset_rss(gram_matrix,subset):
+    if len(subset) == 0:
+        return gram_matrix[-1, -1]
+    subset = list(subset)
+    sxy = gram_matrix[subset, -1]
+    return gram_matrix[-1, -1] - sxy @ np.linalg.solve(gram_matrix[np.ix_(subset, subset)], sxy)
+
+#Visit every subset in Gray-code order, so each step sweeps exactly one predictor in or out.
+def all_subsets(gram_matrix):
+    p = gram_matrix.shape[0] - 1
+    swept = gram_matrix.copy()
+    included = np.zeros(p, dtype=bool)
+    results = [((), swept[-1, -1])]
+    for i in range(1, 2**p):
+        k = (i & -i).bit_length() - 1
+        sweep(swept, k)
+        included[k] = not included[k]
+        results.append((tuple(np.flatnonzero(included)), swept[-1, -1]))
+    return results
+
+#Branch and bound for the lowest-RSS subset of every size up to max_size.
+#A node fixes some predictors in and leaves the rest undecided; the RSS with all of them in
+#is a lower bound for every subset below the node, so the node is pruned when that bound
+#cannot beat the best subset found so far for any reachable size.
+def best_subsets(gram_matrix,max_size=None):
+    p = gram_matrix.shape[0] - 1
+    max_size = p if max_size is None else max_size
+    best = {k: ((), np.inf) for k in range(max_size + 1)}
+    best[0] = ((), gram_matrix[-1, -1])
+
+    #Try the predictors that matter most in the full model first, so good bounds are found early
+    full = list(range(p))
+    order = sorted(full, key=lambda j: subset_rss(gram_matrix, [i for i in full if i != j]), reverse=True)
+
+    stack = [((), tuple(order))]
+    while stack:
+        included, free = stack.pop()
+        sizes = range(len(included), min(len(included) + len(free), max_size) + 1)
+        if len(sizes) == 0:
+            continue
+        bound = subset_rss(gram_matrix, included + free)
+        if all(bound >= best[k][1] for k in sizes):
+            continue
+        if len(included) + len(free) <= max_size and bound < best[len(included) + len(free)][1]:
+            best[len(included) + len(free)] = (tuple(sorted(included + free)), bound)
+        if len(free) == 0:
+            continue
+        stack.append((included, free[1:]))
+        stack.append((included + free[:1], free[1:]))
+    return [best[k] for k in range(max_size + 1) if np.isfinite(best[k][1])]
+
+#Rank subsets of the predictors by AIC or BIC without refitting from the raw rows.
+#method='all' scores every subset; method='best' keeps only the best subset of each size (for 30+ predictors).
+#A (gram_matrix, n) pair from gram() can be passed in to share it with other measures.
+def subset_search(input_Data,response_input,predictor_input,method='all',max_size=None,criterion='bic',gram_result=None):
+    gram_matrix, n = gram(input_Data, response_input, predictor_input) if gram_result is None else gram_result
+    tss = gram_matrix[-1, -1]
+    results = all_subsets(gram_matrix) if method == 'all' else best_subsets(gram_matrix, max_size)
+    rows = []
+    for subset, rss in results:
+        if max_size is not None and len(subset) > max_size:
+            continue
+        rows.append({'predictors': tuple(predictor_input[j] for j in subset), 'n_predictors': len(subset), 'rss': rss,
+                     **fit_measures(rss, tss, n, len(subset))})
+    return pd.DataFrame(rows).sort_values(criterion, ignore_index=True)
+
+#Variance inflation factors of every predictor from one inverted correlation matrix.
+#The correlation matrix of the predictors is read off the Gram matrix (its predictor block, scaled by the
+#diagonal), so this is O(p^3) whatever the number of rows, and VIF_j is the j-th diagonal entry of its inverse.
+def vif(gram_matrix,predictor_input):
+    cross = gram_matrix[:len(predictor_input), :len(predictor_input)]
+    scale = np.sqrt(np.diag(cross))
+    inverse = np.linalg.inv(cross / np.outer(scale, scale))
+    factors = np.diag(inverse)
+    return pd.DataFrame({'vif': factors, 'tolerance': 1 / factors}, index=pd.Index(predictor_input, name='predictor'))
+
+#Rank every subset of the six predictors, and check multicollinearity, from the same Gram matrix
+if __name__ == '__main__':
+    gram_result = gram(inputdata, response, predictor)
+    leaderboard = subset_search(inputdata, response, predictor, gram_result=gram_result)
+    print(leaderboard.head())
+    print(vif(gram_result[0], predictor))
+
+#Ridge regularization path on the standardized data from one SVD of the centered design, X = U S V'.
+#With c = U'y, every alpha only needs O(p) work: the fitted values shrink c_j by s_j^2 / (s_j^2 + alpha),
+#the effective degrees of freedom are the sum of those factors, and the RSS follows directly.
+#Each row matches Ridge(alpha).fit on the same data; AIC/BIC use the effective degrees of freedom plus the intercept.
+def ridge_path(input_Data,response_input,predictor_input,alphas=None):
+    alphas = np.logspace(-3, 4, 100) if alphas is None else np.asarray(alphas, dtype=float)
+    x = input_Data[predictor_input].to_numpy(dtype=float)
+    y = input_Data[response_input].to_numpy(dtype=float)
+    x = x - x.mean(axis=0)
+    y = y - y.mean()
+    n = len(y)
+
+    u, s, vt = np.linalg.svd(x, full_matrices=False)
+    c = u.T @ y
+    tss = y @ y
+    rss_outside = tss - c @ c
+
+    shrink = s**2 / (s**2 + alphas[:, None])
+    df = shrink.sum(axis=1)
+    rss = rss_outside + (((1 - shrink) * c)**2).sum(axis=1)
+    llf = -n / 2 * (np.log(2 * np.pi) + np.log(rss / n) + 1)
+    path = pd.DataFrame({
+        'alpha': alphas,
+        'df': df,
+        'rss': rss,
+        'rsquared': 1 - rss / tss,
+        'aic': -2 * llf + 2 * (df + 1),
+        'bic': -2 * llf + np.log(n) * (df + 1),
+        'gcv': (rss / n) / (1 - (df + 1) / n)**2,
+    })
+    coefficients = pd.DataFrame((shrink / s * c) @ vt, columns=predictor_input)
+    path = pd.concat([path, coefficients], axis=1)
+    best = {criterion: float(path.loc[path[criterion].idxmin(), 'alpha']) for criterion in ['aic', 'bic', 'gcv']}
+    return path, best
+
+#Goodness of fit across 100 ridge alphas, and the final Ridge model at the alpha that minimizes BIC
+if __name__ == '__main__':
+    path, best_alpha = ridge_path(inputdata, response, predictor)
+    print(path[['alpha', 'df', 'rsquared', 'aic', 'bic', 'gcv']].iloc[::10])
+    print(f"Best alpha by criterion: {best_alpha}")
+    ridge_model = Ridge(alpha=best_alpha['bic']).fit(inputdata[predictor], inputdata[response])
+    print(f"Ridge coefficients at the BIC-best alpha:\n{pd.Series(ridge_model.coef_, index=predictor)}")
+
+#K-fold cross-validated goodness of fit by Gram-matrix downdating.
+#Each fold's cross-products [1, x, y]'[1, x, y] are computed once; the full Gram matrix is their sum, and the model
+#for a fold is solved from the full matrix minus that fold's contribution, so no fold is ever refit from the rows.
+#Folds are processed in threads (numpy releases the GIL), and the out-of-fold residuals give R^2, RMSE and the
+#Gaussian log-likelihood with the training fold's variance.
+def cross_validate(input_Data,response_input,predictor_input,k=5,seed=0,n_workers=None):
+    values = input_Data[list(predictor_input) + [response_input]].to_numpy(dtype=float)
+    n = len(values)
+    folds = np.random.default_rng(seed).permutation(n) % k
+    p = len(predictor_input) + 1
+
+    def fold_gram(fold):
+        z = np.empty((np.count_nonzero(folds == fold), p + 1))
+        z[:, 0] = 1
+        z[:, 1:] = values[folds == fold]
+        return z, z.T @ z
+
+    def score_fold(fold):
+        z, fold_gram_matrix = fold_data[fold]
+        train = full_gram - fold_gram_matrix
+        n_train = train[0, 0]
+        beta = np.linalg.solve(train[:p, :p], train[:p, p])
+        sigma2 = (train[p, p] - beta @ train[:p, p]) / n_train
+        y_mean = train[0, p] / n_train
+        residuals = z[:, p] - z[:, :p] @ beta
+        sse = residuals @ residuals
+        return {'fold': fold, 'n': len(z), 'sse': sse, 'sst': np.sum((z[:, p] - y_mean)**2),
+                'loglik': -len(z) / 2 * np.log(2 * np.pi * sigma2) - sse / (2 * sigma2)}
+
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        fold_data = list(pool.map(fold_gram, range(k)))
+        full_gram = sum(gram_matrix for _, gram_matrix in fold_data)
+        scores = pd.DataFrame(list(pool.map(score_fold, range(k))))
+
+    total = scores[['n', 'sse', 'sst', 'loglik']].sum()
+    scores.loc[len(scores)] = {'fold': 'total', **total}
+    scores['rsquared'] = 1 - scores['sse'] / scores['sst']
+    scores['rmse'] = np.sqrt(scores['sse'] / scores['n'])
+    scores['n'] = scores['n'].astype(np.int64)
+    return scores.set_index('fold')[['n', 'rsquared', 'rmse', 'loglik']]
+
+#Out-of-fold goodness of fit, to compare with the in-sample r^2 above
+if __name__ == '__main__':
+    print(cross_validate(inputdata, response, predictor))
+
+#Test Functions
+#Moments merged over uneven chunks with NaNs (including a chunk where one column is all NaN) match pandas.
+def test_moments():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({'a': rng.exponential(size=500), 'b': rng.normal(10, 3, size=500), 'c': rng.integers(0, 5, size=500).astype(float)})
+    frame.loc[rng.choice(500, 40, replace=False), 'a'] = np.nan
+    frame.loc[rng.choice(500, 15, replace=False), 'b'] = np.nan
+    frame.loc[100:130, 'c'] = np.nan
+
+    moments = Moments(frame.columns)
+    for start, stop in [(0, 1), (1, 100), (100, 131), (131, 132), (132, 500)]:
+        moments.update(frame.iloc[start:stop])
+    summary = moments.summary()
+
+    assert np.array_equal(summary.loc['nulls'], frame.isnull().sum())
+    assert np.array_equal(summary.loc['count'], frame.count())
+    for statistic in ['mean', 'std', 'min', 'max', 'skew', 'kurt']:
+        assert np.allclose(summary.loc[statistic], getattr(frame, statistic)())
@@ -9,15 +9,88 @@ from statsmodels.stats.diagnostic import het_breuschpagan
 import statsmodels.api as sm
 from statsmodels.stats.stattools import durbin_watson
 import numpy as np
+from scipy import stats
+import json
+import os
+from functools import cached_property
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 
 
-def preprocess():
+def load_copper(path='copper-new.txt', chunksize=None, cache=True):
     """
-    Loads copper data from a file, preprocesses it by extracting X and y values,
-    converts data types, and splits the dataset into training and testing sets.
+    Loads the whitespace-delimited copper data (y in the first column, X in the second)
+    into a float array with columns [X, y]. Parsing is vectorized, and the parsed values
+    are written to a binary cache next to the source file that later runs memory-map
+    without parsing, as long as the source file's size and modification time are unchanged.
+    If the cache cannot be written, the parsed array is returned without it.
     
     Parameters:
-    None
+    path (str): Path to the copper data file.
+    chunksize (int, optional): Number of rows parsed at a time, for files bigger than RAM.
+    cache (bool): Whether to read from / write to the binary cache.
+    
+    Returns:
+    numpy.ndarray: Array of shape (n, 2) with the X and y columns (a read-only memmap when cached).
+    """
+    cache_path = path + '.bin'
+    meta_path = path + '.bin.json'
+    source_stat = os.stat(path)
+    fingerprint = {'size': source_stat.st_size, 'mtime_ns': source_stat.st_mtime_ns}
+
+    # reuse the cache if it was built from this exact version of the file
+    if cache and os.path.exists(cache_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('source') == fingerprint:
+            if meta['n_rows'] == 0:
+                return np.empty((0, 2))
+            return np.memmap(cache_path, dtype=np.float64, mode='r', shape=(meta['n_rows'], 2))
+
+    read_kwargs = dict(sep=r'\s+', header=None, usecols=[0, 1], names=['y', 'X'], dtype=np.float64)
+
+    if not cache:
+        if chunksize is None:
+            return pd.read_csv(path, **read_kwargs)[['X', 'y']].to_numpy()
+        chunks = pd.read_csv(path, chunksize=chunksize, **read_kwargs)
+        return np.concatenate([chunk[['X', 'y']].to_numpy() for chunk in chunks])
+
+    # stream the parsed rows to a temporary file, then swap it in atomically
+    if chunksize is None:
+        chunks = [pd.read_csv(path, **read_kwargs)]
+    else:
+        chunks = pd.read_csv(path, chunksize=chunksize, **read_kwargs)
+    n_rows = 0
+    try:
+        with open(cache_path + '.tmp', 'wb') as f:
+            for chunk in chunks:
+                np.ascontiguousarray(chunk[['X', 'y']].to_numpy()).tofile(f)
+                n_rows += len(chunk)
+        os.replace(cache_path + '.tmp', cache_path)
+        with open(meta_path, 'w') as f:
+            json.dump({'source': fingerprint, 'n_rows': n_rows}, f)
+    except OSError:
+        # the cache cannot be written (e.g. a read-only data directory), so parse into memory instead
+        if os.path.exists(cache_path + '.tmp'):
+            try:
+                os.remove(cache_path + '.tmp')
+            except OSError:
+                pass
+        return load_copper(path, chunksize=chunksize, cache=False)
+
+    if n_rows == 0:
+        return np.empty((0, 2))
+    return np.memmap(cache_path, dtype=np.float64, mode='r', shape=(n_rows, 2))
+
+def preprocess(path='copper-new.txt', chunksize=None, cache=True):
+    """
+    Loads copper data from a file, extracts the X and y values,
+    and splits the dataset into training and testing sets.
+    
+    Parameters:
+    path (str): Path to the copper data file.
+    chunksize (int, optional): Number of rows parsed at a time, for files bigger than RAM.
+    cache (bool): Whether to use the binary cache written by load_copper.
 
     Returns:
     X_train - the train set for X features
@@ -26,20 +99,13 @@ def preprocess():
     y_test - the test set for y target
     
     """
-    # load data from file
-    copperdata = pd.read_csv('copper-new.txt',header=None)
-    # extract x and y values
-    copperdata['X'] = copperdata.apply(lambda x: x.str.split()[0][1],axis=1)
-    copperdata['y'] = copperdata.apply(lambda x: x.str.split()[0][0],axis=1)
-    # convert to float
-    copperdata = copperdata[['X','y']].astype(float)
+    # load data from file (or its binary cache)
+    copperdata = load_copper(path, chunksize=chunksize, cache=cache)
     # display a sample of the table
-    print(copperdata.head())
-    # separate features and target
-    X = copperdata['X'].values
-    y = copperdata['y'].values
-    # use the "reshape" for prep of sklearn
-    X = X.reshape(-1,1)
+    print(pd.DataFrame(copperdata[:5], columns=['X', 'y']))
+    # separate features and target; X keeps the 2D shape sklearn expects
+    X = copperdata[:, :1]
+    y = copperdata[:, 1]
     # split
     X_train,X_test,y_train,y_test = train_test_split(X, y, random_state=0,test_size=0.2)
 
@@ -47,7 +113,7 @@ def preprocess():
 
     return X_train,X_test,y_train,y_test, X, y
 
-def linReg(X_train,X_test,y_train,y_test, X, y):
+def linReg(X_train,X_test,y_train,y_test, X, y, robust=None, return_weights=False):
     """
     Performs linear regression on the given training data and predicts outcomes for the test data.
     Calculates residuals between predicted and actual test values.
@@ -57,26 +123,102 @@ def linReg(X_train,X_test,y_train,y_test, X, y):
     X_test - the test set for X features
     y_train - the train set for y target
     y_test - the test set for y target
+    robust - None for ordinary least squares, or 'huber' / 'tukey' for a robust IRLS fit
+    return_weights - whether to also return the final IRLS weights of the training rows
     
     Returns:
     residuals - list of residuals
     y_pred - the list of predicted results from the model
+    weights - (only with return_weights) the IRLS weights, or None for ordinary least squares
     """
 
-    # fit linear regression model
-    regression = LinearRegression().fit(X_train, y_train)
+    weights = None
+    if robust is None:
+        # fit linear regression model
+        regression = LinearRegression().fit(X_train, y_train)
+        predict = regression.predict
+    else:
+        # fit robust regression model, down-weighting influential points
+        intercept, coef, weights = robust_fit(X_train, y_train, method=robust)
+
+        def predict(features):
+            return intercept + np.asarray(features, dtype=float).reshape(len(features), -1) @ coef
     # predict y value
-    y_pred = regression.predict(X_test)
+    y_pred = predict(X_test)
     # # get residuals
     residuals = y_pred - y_test
 
 
 
-    y_pred_full = regression.predict(X)
+    y_pred_full = predict(X)
     residuals_full = y - y_pred_full
 
+    if return_weights:
+        return residuals, y_pred, residuals_full, y_pred_full, weights
     return residuals, y_pred, residuals_full, y_pred_full
 
+def robust_fit(X, y, method='huber', tuning=None, max_iter=50, tol=1e-8):
+    """
+    Fits a robust linear regression (Huber or Tukey biweight M-estimator) with
+    iteratively reweighted least squares. The fit is warm-started from OLS, the
+    products x_j*x_k and x_j*y are formed once so each iteration's weighted normal
+    equations are two matrix-vector products, and iterations stop once the
+    coefficients stop changing.
+    
+    Parameters:
+    X (array-like): The feature matrix (without the intercept column).
+    y (array-like): The target values.
+    method (str): 'huber' or 'tukey'.
+    tuning (float, optional): Tuning constant. If None, uses 1.345 (Huber) or 4.685 (Tukey).
+    max_iter (int): Maximum number of IRLS iterations.
+    tol (float): Relative change in the coefficients at which the fit has converged.
+    
+    Returns:
+    intercept - the fitted intercept
+    coef - the fitted slopes
+    weights - the final IRLS weight of each observation
+    """
+    if method not in ('huber', 'tukey'):
+        raise ValueError(f"method must be 'huber' or 'tukey', got {method!r}")
+    if tuning is None:
+        tuning = 1.345 if method == 'huber' else 4.685
+
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X.reshape(-1, 1)
+    y = np.asarray(y, dtype=float)
+    design = _design_chunk(X)
+    n_params = design.shape[1]
+
+    # products reused by every iteration: X'WX = w @ cross, X'Wy = w @ xy
+    rows, cols = np.triu_indices(n_params)
+    cross = design[:, rows] * design[:, cols]
+    xy = design * y[:, None]
+
+    # warm start from the OLS solution
+    weights = np.ones_like(y)
+    beta = np.zeros(n_params)
+    for _ in range(max_iter + 1):
+        gram = np.zeros((n_params, n_params))
+        gram[rows, cols] = weights @ cross
+        gram[cols, rows] = gram[rows, cols]
+        beta_new = np.linalg.solve(gram, weights @ xy)
+        converged = np.max(np.abs(beta_new - beta)) <= tol * (np.max(np.abs(beta_new)) + tol)
+        beta = beta_new
+        if converged:
+            break
+
+        # vectorized weight update from the scaled residuals (MAD about zero, as in statsmodels RLM)
+        residuals = y - design @ beta
+        scale = np.median(np.abs(residuals)) / 0.6745
+        u = np.abs(residuals) / scale if scale > 0 else np.zeros_like(residuals)
+        if method == 'huber':
+            weights = tuning / np.maximum(u, tuning)
+        else:
+            weights = np.where(u < tuning, (1 - (u / tuning)**2)**2, 0.0)
+
+    return beta[0], beta[1:], weights
+
 def residual_plot(residuals, y_pred):
     """
     Creates and displays a scatter plot of residuals against predicted values.
@@ -102,40 +244,79 @@ def residual_plot(residuals, y_pred):
     # display
     plt.show()
 
-def calculate_leverage(X_test):
+def calculate_leverage(X_test, fit_intercept=True, chunk_size=100_000):
     """
     Calculates the leverage (hat matrix diagonal) for each observation in the test set.
-    Leverage indicates the influence of each data point on the model's predictions
+    Leverage indicates the influence of each data point on the model's predictions.
+    Only the diagonal is computed, so memory grows as O(n*p) instead of O(n^2).
     
     Parameters:
     X (array-like): The design matrix of the regression model.
+    fit_intercept (bool): Whether to add the intercept column that LinearRegression fits.
+    chunk_size (int): Number of rows processed at a time.
     
     Returns:
     numpy.ndarray: Leverage values for each observation.
     """
-    # convert input to numpy array
-    X = np.array(X_test)
-    # calculate hat matrix
-    hat_matrix = X.dot(np.linalg.inv(X.T.dot(X))).dot(X.T)
+    # convert input to a 2D numpy array
+    X = np.asarray(X_test, dtype=float)
+    if X.ndim == 1:
+        X = X.reshape(-1, 1)
+    n_obs = X.shape[0]
+
+    # accumulate X'X one chunk of rows at a time
+    n_cols = X.shape[1] + int(fit_intercept)
+    xtx = np.zeros((n_cols, n_cols))
+    for start in range(0, n_obs, chunk_size):
+        chunk = _design_chunk(X[start:start + chunk_size], fit_intercept)
+        xtx += chunk.T @ chunk
+
+    # h_ii = x_i' (X'X)^-1 x_i = ||L^-1 x_i||^2 where X'X = LL'
+    l_inv = np.linalg.inv(np.linalg.cholesky(xtx))
 
-    return np.diagonal(hat_matrix)
+    leverage = np.empty(n_obs)
+    for start in range(0, n_obs, chunk_size):
+        chunk = _design_chunk(X[start:start + chunk_size], fit_intercept)
+        leverage[start:start + chunk_size] = np.sum((chunk @ l_inv.T)**2, axis=1)
 
-def cooks_distance(residuals, leverage, n_params = 1):
+    return leverage
+
+def _design_chunk(X_chunk, fit_intercept=True):
+    """
+    Builds the design matrix for a chunk of rows, prepending the intercept column if needed.
+    
+    Parameters:
+    X_chunk (numpy.ndarray): 2D array of feature rows.
+    fit_intercept (bool): Whether to prepend a column of ones.
+    
+    Returns:
+    numpy.ndarray: The design matrix rows.
+    """
+    if not fit_intercept:
+        return X_chunk
+    return np.hstack([np.ones((X_chunk.shape[0], 1)), X_chunk])
+
+def cooks_distance(residuals, leverage, n_params=None):
     """
     Calculates Cook's distance for each observation in the dataset.
     Cook distance measures the influence of each data point on the regression results.
     
     Parameters:
-    residuals (array-like): The residuals from the regression model.
+    residuals (array-like): The residuals from the regression model (fitted on all observations).
     leverage (array-like): The leverage (hat matrix diagonal) for each observation.
-    n_params (int): The number of parameters in the model (including intercept).
+    n_params (int, optional): The number of parameters in the model (including intercept).
+                              If None, uses the trace of the hat matrix, the sum of the leverage.
     
     Returns:
     numpy.ndarray: Cook's distance for each observation.
     """
     # convert inputs to numpy arrays
-    residuals = np.array(residuals)
-    leverage = np.array(leverage)
+    residuals = np.asarray(residuals, dtype=float)
+    leverage = np.asarray(leverage, dtype=float)
+
+    # the leverage sums to the number of parameters of the fit
+    if n_params is None:
+        n_params = int(round(np.sum(leverage)))
 
     # calculate number of observations
     n_obs = len(residuals)
@@ -143,54 +324,178 @@ def cooks_distance(residuals, leverage, n_params = 1):
     # calculate mean squared error
     mse = np.sum(residuals**2) / (n_obs - n_params)
     
-    # get cook's distance
-    cook_numerator = (residuals / (1 - leverage))**2
-    cook_denominator = n_params * mse
-    cooks_d = cook_numerator / cook_denominator
+    # get cook's distance: e_i^2 / (p * mse) * h_ii / (1 - h_ii)^2
+    cooks_d = residuals**2 / (n_params * mse) * leverage / (1 - leverage)**2
     
     return cooks_d
 
-def visualize_cooks_distance(cooks_distances, threshold=None):
+class Influence:
+    """
+    Influence measures for an OLS fit, all derived from one thin QR factorization
+    of the design matrix. Each measure is computed on first access and cached,
+    and every measure is a vectorized O(n*p) operation on top of the factorization.
+    With weights (e.g. the final IRLS weights of robust_fit), the measures are those
+    of the weighted fit, computed on the rows scaled by sqrt(w), so the residuals are
+    sqrt(w_i) * (y_i - x_i*beta) and points the robust fit rejected (w = 0) have no influence.
+    
+    Parameters:
+    X (array-like): The feature matrix (without the intercept column).
+    y (array-like): The target values.
+    fit_intercept (bool): Whether to add the intercept column that LinearRegression fits.
+    weights (array-like, optional): Observation weights of a weighted (or robust) fit.
+    """
+
+    def __init__(self, X, y, fit_intercept=True, weights=None):
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        self.design = _design_chunk(X, fit_intercept)
+        self.y = np.asarray(y, dtype=float)
+        self.n_obs, self.n_params = self.design.shape
+        self.sqrt_weights = np.ones(self.n_obs) if weights is None else np.sqrt(np.asarray(weights, dtype=float))
+        if weights is not None:
+            self.design = self.design * self.sqrt_weights[:, None]
+            self.y = self.y * self.sqrt_weights
+        # X = QR, so the hat matrix is QQ' and (X'X)^-1 = R^-1 R^-T
+        self.q, self.r = np.linalg.qr(self.design)
+        self.r_inv = np.linalg.inv(self.r)
+
+    @cached_property
+    def params(self):
+        """Fitted coefficients (intercept first when fit_intercept is True)."""
+        return self.r_inv @ (self.q.T @ self.y)
+
+    @cached_property
+    def residuals(self):
+        """Residuals y - X*beta of the fit."""
+        return self.y - self.design @ self.params
+
+    @cached_property
+    def leverage(self):
+        """Diagonal of the hat matrix."""
+        return np.sum(self.q**2, axis=1)
+
+    @cached_property
+    def mse(self):
+        """Residual mean square, SSE / (n - p)."""
+        return np.sum(self.residuals**2) / (self.n_obs - self.n_params)
+
+    @cached_property
+    def sigma_not_obs(self):
+        """Residual standard deviation with each observation left out in turn."""
+        sse = self.mse * (self.n_obs - self.n_params)
+        sse_not_obs = sse - self.residuals**2 / (1 - self.leverage)
+        return np.sqrt(sse_not_obs / (self.n_obs - self.n_params - 1))
+
+    @cached_property
+    def studentized_residuals_internal(self):
+        """Residuals scaled by sqrt(mse * (1 - h_ii))."""
+        return self.residuals / np.sqrt(self.mse * (1 - self.leverage))
+
+    @cached_property
+    def studentized_residuals_external(self):
+        """Residuals scaled by the leave-one-out standard deviation, sqrt(s_(i)^2 * (1 - h_ii))."""
+        return self.residuals / (self.sigma_not_obs * np.sqrt(1 - self.leverage))
+
+    @cached_property
+    def loo_residuals(self):
+        """Leave-one-out (deleted) residuals e_i / (1 - h_ii), without refitting."""
+        return self.residuals / (1 - self.leverage)
+
+    @cached_property
+    def press(self):
+        """PRESS statistic, the sum of squared leave-one-out residuals."""
+        return np.sum(self.loo_residuals**2)
+
+    @cached_property
+    def predicted_r2(self):
+        """Predicted R^2, 1 - PRESS / total sum of squares (weighted, when there are weights)."""
+        weighted_mean = (self.sqrt_weights @ self.y) / np.sum(self.sqrt_weights**2)
+        return 1 - self.press / np.sum((self.y - self.sqrt_weights * weighted_mean)**2)
+
+    @cached_property
+    def cooks_distance(self):
+        """Cook's distance for each observation."""
+        return self.studentized_residuals_internal**2 * self.leverage / (self.n_params * (1 - self.leverage))
+
+    @cached_property
+    def dffits(self):
+        """DFFITS for each observation, using the externally studentized residuals."""
+        return self.studentized_residuals_external * np.sqrt(self.leverage / (1 - self.leverage))
+
+    @cached_property
+    def dfbetas(self):
+        """
+        DFBETAS, shape (n, p): the change in each coefficient when the observation is
+        left out, scaled by s_(i) * sqrt((X'X)^-1_jj).
+        """
+        # (X'X)^-1 x_i = R^-1 q_i, so the change in beta is R^-1 q_i * e_i / (1 - h_ii)
+        dfbeta = (self.q @ self.r_inv.T) * (self.residuals / (1 - self.leverage))[:, None]
+        cov_diag = np.sum(self.r_inv**2, axis=1)
+        return dfbeta / (self.sigma_not_obs[:, None] * np.sqrt(cov_diag))
+
+def visualize_cooks_distance(cooks_distances, threshold=None, max_bins=None, top_k=20):
     """
     Visualize Cook's distance for each observation.
+    When there are more observations than the figure is wide in pixels, the bars are
+    aggregated into one bin per pixel column (the maximum distance in each bin is drawn)
+    and the dense layers are rasterized, so the rendering time does not grow with n.
+    Only the top_k most influential points are annotated.
     
     Parameters:
     cooks_distances (array-like): Array of Cook's distances for each observation.
     threshold (float, optional): Threshold for influential points. If None, uses 4/n.
+    max_bins (int, optional): Largest number of bars drawn before switching to binned mode.
+                              If None, uses the figure width in pixels (width x dpi).
+    top_k (int): Number of most influential points annotated.
     
     Returns:
     None (displays the plot)
     """
+    cooks_distances = np.asarray(cooks_distances)
     n = len(cooks_distances)
     
+    # Add threshold line
+    if threshold is None:
+        threshold = 4 / n
+    influential = cooks_distances > threshold
+
     # Set up the plot
-    plt.figure(figsize=(12, 6))
-    plt.bar(range(n), cooks_distances)
+    figure = plt.figure(figsize=(12, 6))
+    if max_bins is None:
+        max_bins = int(figure.get_figwidth() * figure.dpi)
     plt.xlabel('Observation')
     plt.ylabel("Cook's Distance")
     plt.title("Cook's Distance for Influential Observations")
-    
-    # Add threshold line
-    if threshold is None:
-        threshold = 4 / n
     plt.axhline(y=threshold, color='r', linestyle='--', label=f'Threshold ({threshold:.4f})')
-    
-    # Highlight influential points
-    influential = cooks_distances > threshold
-    plt.scatter(range(n), cooks_distances, c=['r' if i else 'b' for i in influential], zorder=3)
-    
+
+    # Annotate only the most influential points
+    k = min(top_k, int(np.count_nonzero(influential)))
+    annotated = np.argpartition(cooks_distances, n - k)[n - k:] if k > 0 else np.array([], dtype=int)
+
+    if n <= max_bins:
+        plt.bar(range(n), cooks_distances)
+        # Highlight influential points
+        plt.scatter(range(n), cooks_distances, c=np.where(influential, 'r', 'b'), zorder=3)
+    else:
+        # Aggregate observations into bins, keeping the largest distance in each
+        edges = np.linspace(0, n, max_bins + 1).astype(int)
+        bin_max = np.maximum.reduceat(cooks_distances, edges[:-1])
+        centers = (edges[:-1] + edges[1:]) / 2
+        plt.vlines(centers, 0, bin_max, colors=np.where(bin_max > threshold, 'r', 'b'), rasterized=True)
+        plt.scatter(annotated, cooks_distances[annotated], c='r', zorder=3)
+
     # Add labels for influential points
-    for i, (d, inf) in enumerate(zip(cooks_distances, influential)):
-        if inf:
-            plt.annotate(f'{i}', (i, d), xytext=(0, 5), textcoords='offset points', ha='center')
+    for i in annotated:
+        plt.annotate(f'{i}', (i, cooks_distances[i]), xytext=(0, 5), textcoords='offset points', ha='center')
     
     plt.legend()
     plt.tight_layout()
     plt.show()
     
     # Print summary
-    print(f"Number of influential observations: {sum(influential)}")
-    print(f"Indices of influential observations: {np.where(influential)[0]}")
+    print(f"Number of influential observations: {np.count_nonzero(influential)}")
+    print(f"Indices of influential observations: {np.flatnonzero(influential)}")
 
 
 def Breusch_Pagan(residuals, X_test):
@@ -234,13 +539,573 @@ def Durbin_Watson(residuals):
     print("Since the value is  below 2, it indicates a strong positive autocorrelation")
 
 
-def main():
+class OnlineDurbinWatson:
+    """
+    Durbin-Watson statistic over residuals that arrive in batches.
+    Only the last residual, the running sum of squared successive differences
+    and the running sum of squares are kept, so memory is O(1).
+    """
+
+    def __init__(self):
+        self.n_obs = 0
+        self.sum_sq_diff = 0.0
+        self.sum_sq = 0.0
+        self.last = None
+
+    def update(self, residuals):
+        """
+        Adds a batch of residuals, in time order, to the running sums.
+        
+        Parameters:
+        residuals (array-like): The next residuals from the model.
+        
+        Returns:
+        OnlineDurbinWatson: self, so calls can be chained.
+        """
+        residuals = np.asarray(residuals, dtype=float).ravel()
+        if residuals.size == 0:
+            return self
+        if self.last is not None:
+            self.sum_sq_diff += (residuals[0] - self.last)**2
+        self.sum_sq_diff += np.sum(np.diff(residuals)**2)
+        self.sum_sq += np.sum(residuals**2)
+        self.last = residuals[-1]
+        self.n_obs += residuals.size
+        return self
+
+    def statistic(self):
+        """
+        Returns:
+        float: The Durbin-Watson statistic of all residuals seen so far.
+        """
+        return self.sum_sq_diff / self.sum_sq
+
+class OnlineBreuschPagan:
+    """
+    Breusch-Pagan test over residual/feature batches that arrive over time.
+    The auxiliary regression of the squared residuals on the features (plus a constant)
+    is kept as cross-products, so memory is O(p^2) however many rows are seen.
+    The results match statsmodels' het_breuschpagan on the concatenated data.
+    
+    Parameters:
+    robust (bool): Koenker's studentized version (the statsmodels default) if True.
+    """
+
+    def __init__(self, robust=True):
+        self.robust = robust
+        self.n_obs = 0
+        self.ztz = None
+        self.ztu = None
+        self.sum_u = 0.0
+        self.sum_u_sq = 0.0
+
+    def update(self, residuals, X):
+        """
+        Adds a batch of residuals and the matching feature rows to the cross-products.
+        
+        Parameters:
+        residuals (array-like): The residuals for the batch.
+        X (array-like): The feature rows for the batch (without the constant column).
+        
+        Returns:
+        OnlineBreuschPagan: self, so calls can be chained.
+        """
+        u = np.asarray(residuals, dtype=float).ravel()**2
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        z = _design_chunk(X)
+        if self.ztz is None:
+            self.ztz = np.zeros((z.shape[1], z.shape[1]))
+            self.ztu = np.zeros(z.shape[1])
+        self.ztz += z.T @ z
+        self.ztu += z.T @ u
+        self.sum_u += np.sum(u)
+        self.sum_u_sq += np.sum(u**2)
+        self.n_obs += u.size
+        return self
+
+    def result(self):
+        """
+        Returns:
+        tuple: (lm, lm_pvalue, fvalue, f_pvalue), as returned by het_breuschpagan.
+        """
+        n_vars = self.ztz.shape[0]
+        coef = np.linalg.solve(self.ztz, self.ztu)
+        # auxiliary regression sums of squares, from the cross-products alone
+        tss = self.sum_u_sq - self.sum_u**2 / self.n_obs
+        ssr = self.sum_u_sq - coef @ self.ztu
+        ess = tss - ssr
+        if self.robust:
+            lm = self.n_obs * ess / tss
+        else:
+            lm = ess / (self.sum_u / self.n_obs)**2 / 2
+        lm_pvalue = stats.chi2.sf(lm, n_vars - 1)
+        df_resid = self.n_obs - n_vars
+        fvalue = (ess / (n_vars - 1)) / (ssr / df_resid)
+        f_pvalue = stats.f.sf(fvalue, n_vars - 1, df_resid)
+        return lm, lm_pvalue, fvalue, f_pvalue
+
+
+class OnlineRobustCovariance:
+    """
+    Heteroskedasticity-robust (HC0-HC3) sandwich covariance of the OLS coefficients,
+    accumulated from residual/feature batches. Only X'X and the three weighted
+    "meat" matrices are kept, so extra memory is O(p^2) and the total work is O(n*p^2).
+    HC2 and HC3 need the leverage of each row against the X'X of all rows. For data
+    that does not fit in memory, make two passes over the chunks: accumulate_gram in
+    the first, then update without leverage in the second, which computes each row's
+    leverage as ||L^-1 x_i||^2 from the Cholesky factor of the full X'X.
+    
+    Parameters:
+    fit_intercept (bool): Whether to add the intercept column that LinearRegression fits.
+    """
+
+    def __init__(self, fit_intercept=True):
+        self.fit_intercept = fit_intercept
+        self.n_obs = 0
+        self.xtx = None
+        self.meat = None
+        self.has_leverage = True
+        self.full_xtx = None
+        self.l_inv = None
+
+    def accumulate_gram(self, X):
+        """
+        First pass: adds a batch of feature rows to the X'X used for the leverage in update.
+        
+        Parameters:
+        X (array-like): The feature rows for the batch.
+        
+        Returns:
+        OnlineRobustCovariance: self, so calls can be chained.
+        """
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        z = _design_chunk(X, self.fit_intercept)
+        if self.full_xtx is None:
+            self.full_xtx = np.zeros((z.shape[1], z.shape[1]))
+        self.full_xtx += z.T @ z
+        self.l_inv = None
+        return self
+
+    def update(self, residuals, X, leverage=None):
+        """
+        Adds a batch of residuals, the matching feature rows and, optionally, their leverage.
+        Without leverage, it is computed from the X'X of the first pass (accumulate_gram), if any.
+        
+        Parameters:
+        residuals (array-like): The residuals for the batch.
+        X (array-like): The feature rows for the batch.
+        leverage (array-like, optional): The leverage of each row, needed for HC2 and HC3.
+        
+        Returns:
+        OnlineRobustCovariance: self, so calls can be chained.
+        """
+        e_sq = np.asarray(residuals, dtype=float).ravel()**2
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        z = _design_chunk(X, self.fit_intercept)
+        if self.xtx is None:
+            self.xtx = np.zeros((z.shape[1], z.shape[1]))
+            self.meat = {kind: np.zeros_like(self.xtx) for kind in ('HC0', 'HC2', 'HC3')}
+        self.xtx += z.T @ z
+
+        # h_i = ||L^-1 x_i||^2 against the X'X of every row, from the first pass
+        if leverage is None and self.full_xtx is not None:
+            if self.l_inv is None:
+                self.l_inv = np.linalg.inv(np.linalg.cholesky(self.full_xtx))
+            leverage = np.sum((z @ self.l_inv.T)**2, axis=1)
+
+        # HC0 weights e^2, HC2 e^2 / (1 - h), HC3 e^2 / (1 - h)^2
+        weights = {'HC0': e_sq}
+        if leverage is None:
+            self.has_leverage = False
+        else:
+            one_minus_h = 1 - np.asarray(leverage, dtype=float).ravel()
+            weights['HC2'] = e_sq / one_minus_h
+            weights['HC3'] = e_sq / one_minus_h**2
+        for kind, w in weights.items():
+            self.meat[kind] += (z * w[:, None]).T @ z
+        self.n_obs += e_sq.size
+        return self
+
+    def covariance(self, kind='HC3'):
+        """
+        Parameters:
+        kind (str): One of 'HC0', 'HC1', 'HC2', 'HC3'.
+        
+        Returns:
+        numpy.ndarray: The (p, p) robust covariance matrix of the coefficients.
+        """
+        if kind not in ('HC0', 'HC1', 'HC2', 'HC3'):
+            raise ValueError(f"kind must be one of 'HC0', 'HC1', 'HC2', 'HC3', got {kind!r}")
+        if kind in ('HC2', 'HC3') and not self.has_leverage:
+            raise ValueError(f'{kind} needs the leverage of every row passed to update')
+        bread = np.linalg.inv(self.xtx)
+        cov = bread @ self.meat['HC0' if kind == 'HC1' else kind] @ bread
+        if kind == 'HC1':
+            cov *= self.n_obs / (self.n_obs - self.xtx.shape[0])
+        return cov
+
+    def standard_errors(self, kind='HC3'):
+        """
+        Parameters:
+        kind (str): One of 'HC0', 'HC1', 'HC2', 'HC3'.
+        
+        Returns:
+        numpy.ndarray: The robust standard error of each coefficient (intercept first).
+        """
+        return np.sqrt(np.diag(self.covariance(kind)))
+
+def robust_standard_errors(X, residuals, leverage=None, chunk_size=100_000):
+    """
+    Calculates HC0-HC3 robust standard errors from the residuals and leverage of an OLS fit,
+    processing the rows in chunks. X and the residuals may be memory-mapped (e.g. from
+    load_copper): only one chunk is read at a time, in two passes over the rows.
+    
+    Parameters:
+    X (array-like): The feature matrix.
+    residuals (array-like): The residuals of the OLS fit on X.
+    leverage (array-like, optional): The leverage of each row. If None, it is computed
+                                     chunk by chunk from the X'X of the first pass.
+    chunk_size (int): Number of rows processed at a time.
+    
+    Returns:
+    pandas.DataFrame: Standard errors with one row per coefficient and one column per HC type.
+    """
+    # arrays (and memmaps) are sliced as they are, without reading them into memory
+    if not isinstance(X, np.ndarray):
+        X = np.asarray(X, dtype=float)
+    if not isinstance(residuals, np.ndarray):
+        residuals = np.asarray(residuals, dtype=float)
+    if X.ndim == 1:
+        X = X.reshape(-1, 1)
+
+    sandwich = OnlineRobustCovariance()
+    if leverage is None:
+        for start in range(0, X.shape[0], chunk_size):
+            sandwich.accumulate_gram(X[start:start + chunk_size])
+    for start in range(0, X.shape[0], chunk_size):
+        stop = start + chunk_size
+        sandwich.update(residuals[start:stop], X[start:stop], None if leverage is None else leverage[start:stop])
+
+    index = ['const'] + [f'x{j + 1}' for j in range(X.shape[1])]
+    return pd.DataFrame({kind: sandwich.standard_errors(kind) for kind in ('HC0', 'HC1', 'HC2', 'HC3')}, index=index)
+
+
+# design matrix shared with the bootstrap workers, attached once per process
+_bootstrap_shm = None
+_bootstrap_data = None
+
+def _bootstrap_init(shm_name, shape):
+    """
+    Attaches a bootstrap worker to the shared-memory block holding [X | y].
+    
+    Parameters:
+    shm_name (str): Name of the shared-memory block.
+    shape (tuple): Shape of the float64 array stored in it.
+    
+    Returns:
+    None
+    """
+    global _bootstrap_shm, _bootstrap_data
+    _bootstrap_shm = shared_memory.SharedMemory(name=shm_name)
+    _bootstrap_data = np.ndarray(shape, dtype=np.float64, buffer=_bootstrap_shm.buf)
+
+def _bootstrap_batch(seed_seq, n_reps):
+    """
+    Runs a batch of bootstrap replicates on the shared [X | y] array.
+    Each replicate resamples rows with replacement, refits, and recomputes the diagnostics.
+    
+    Parameters:
+    seed_seq (numpy.random.SeedSequence): The RNG stream for this batch.
+    n_reps (int): Number of replicates in the batch.
+    
+    Returns:
+    numpy.ndarray: Shape (n_reps, 4) with the max Cook's distance, the number of
+    influential observations (4/n rule), the Durbin-Watson statistic and the Breusch-Pagan p-value.
+    """
+    rng = np.random.default_rng(seed_seq)
+    n_obs = _bootstrap_data.shape[0]
+    results = np.empty((n_reps, 4))
+    for rep in range(n_reps):
+        sample = _bootstrap_data[rng.integers(0, n_obs, size=n_obs)]
+        X, y = sample[:, :-1], sample[:, -1]
+        influence = Influence(X, y)
+        cooks_d = influence.cooks_distance
+        results[rep, 0] = np.max(cooks_d)
+        results[rep, 1] = np.count_nonzero(cooks_d > 4 / n_obs)
+        results[rep, 2] = OnlineDurbinWatson().update(influence.residuals).statistic()
+        results[rep, 3] = OnlineBreuschPagan().update(influence.residuals, X).result()[1]
+    return results
+
+def bootstrap_diagnostics(X, y, n_boot=1000, n_workers=None, batch_size=50, seed=0, quantiles=(0.025, 0.5, 0.975)):
+    """
+    Bootstraps the regression diagnostics across a process pool.
+    X and y are copied once into shared memory that every worker reads from, each batch
+    of replicates gets its own RNG stream spawned from the seed (so results do not depend
+    on the number of workers), and results are collected as the batches finish.
+    Each finished batch is written into its slot of an (n_boot, 4) array, only 32 KB per
+    thousand replicates, and the quantiles are computed exactly once at the end. A streaming
+    quantile sketch would save little memory, and its approximate answers would depend on
+    the order in which batches finish.
+    
+    Parameters:
+    X (array-like): The feature matrix.
+    y (array-like): The target values.
+    n_boot (int): Number of bootstrap replicates.
+    n_workers (int, optional): Number of worker processes. If None, uses the CPU count.
+    batch_size (int): Number of replicates per task sent to a worker.
+    seed (int): Seed for the RNG streams.
+    quantiles (tuple): Quantiles to report.
+    
+    Returns:
+    pandas.DataFrame: The requested quantiles (rows) of each diagnostic (columns).
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X.reshape(-1, 1)
+    shape = (X.shape[0], X.shape[1] + 1)
+    batches = [min(batch_size, n_boot - start) for start in range(0, n_boot, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        data[:, :-1] = X
+        data[:, -1] = y
+        results = np.empty((n_boot, 4))
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_bootstrap_init, initargs=(shm.name, shape)) as pool:
+            futures = {pool.submit(_bootstrap_batch, seed_seq, n_reps): i for i, (seed_seq, n_reps) in enumerate(zip(seeds, batches))}
+            # write each batch into its own slot as soon as it finishes
+            for future in as_completed(futures):
+                start = futures[future] * batch_size
+                results[start:start + batches[futures[future]]] = future.result()
+        del data
+    finally:
+        shm.close()
+        shm.unlink()
+
+    columns = ['max_cooks_distance', 'n_influential', 'durbin_watson', 'breusch_pagan_p']
+    return pd.DataFrame(np.quantile(results, quantiles, axis=0), index=list(quantiles), columns=columns)
+
+
+def leave_one_out(X, y, fit_intercept=True):
+    """
+    Calculates the leave-one-out residuals, the PRESS statistic and the predicted R^2
+    in one vectorized pass, using e_i / (1 - h_ii) instead of refitting n models.
+    
+    Parameters:
+    X (array-like): The feature matrix.
+    y (array-like): The target values.
+    fit_intercept (bool): Whether to add the intercept column that LinearRegression fits.
+    
+    Returns:
+    loo_residuals - the residual of each observation when it is left out of the fit
+    press - the PRESS statistic
+    predicted_r2 - the predicted R^2
+    """
+    influence = Influence(X, y, fit_intercept)
+    return influence.loo_residuals, influence.press, influence.predicted_r2
+
+
+def polynomial_degree_sweep(x, y, max_degree=5):
+    """
+    Fits polynomial models of degree 1..max_degree in x by growing one QR factorization
+    a column at a time, and reports residual diagnostics for each degree.
+    x is centered and scaled first, and each new column is z times the previous
+    orthonormal column (which spans the same space as the next Vandermonde column
+    but stays well conditioned). The new column is orthogonalized twice against the
+    existing ones, so residuals, RSS and leverage are all updated rather than refit,
+    and the whole sweep costs about one fit at max_degree.
+    
+    Parameters:
+    x (array-like): The single feature.
+    y (array-like): The target values.
+    max_degree (int): Highest polynomial degree to fit.
+    
+    Returns:
+    summary - DataFrame indexed by degree with RSS, R^2, AIC, BIC and Cook's distance summaries
+    cooks - numpy.ndarray of shape (max_degree, n) with Cook's distance for each degree
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float)
+    n_obs = x.size
+    z = (x - x.mean()) / x.std()
+
+    q = np.empty((n_obs, max_degree + 1))
+    q[:, 0] = 1 / np.sqrt(n_obs)
+    residuals = y - q[:, 0] * (q[:, 0] @ y)
+    leverage = q[:, 0]**2
+    rss = residuals @ residuals
+    tss = rss
+
+    rows = []
+    cooks = np.empty((max_degree, n_obs))
+    for degree in range(1, max_degree + 1):
+        # new column, orthogonalized twice against the existing basis
+        v = z * q[:, degree - 1]
+        for _ in range(2):
+            v -= q[:, :degree] @ (q[:, :degree].T @ v)
+        q[:, degree] = v / np.linalg.norm(v)
+
+        # update the fit with the new direction
+        coef = q[:, degree] @ y
+        residuals -= coef * q[:, degree]
+        leverage += q[:, degree]**2
+        rss = residuals @ residuals
+
+        n_params = degree + 1
+        mse = rss / (n_obs - n_params)
+        cooks[degree - 1] = residuals**2 * leverage / (n_params * mse * (1 - leverage)**2)
+        # log-likelihood and information criteria as statsmodels reports them
+        llf = -n_obs / 2 * (np.log(2 * np.pi) + np.log(rss / n_obs) + 1)
+        rows.append({
+            'degree': degree,
+            'rss': rss,
+            'r2': 1 - rss / tss,
+            'aic': -2 * llf + 2 * n_params,
+            'bic': -2 * llf + np.log(n_obs) * n_params,
+            'max_cooks_distance': np.max(cooks[degree - 1]),
+            'n_influential': np.count_nonzero(cooks[degree - 1] > 4 / n_obs),
+        })
+
+    return pd.DataFrame(rows).set_index('degree'), cooks
+
+
+# Test Functions
+def test_leave_one_out():
+    """Test the closed-form leave-one-out residuals, PRESS and predicted R^2 against refitting LinearRegression once per held-out point on a small random dataset."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(30, 2))
+    y = X @ np.array([1.5, -2.0]) + rng.normal(size=30)
+    loo_residuals, press, predicted_r2 = leave_one_out(X, y)
+
+    brute_force = np.empty(30)
+    for i in range(30):
+        keep = np.arange(30) != i
+        regression = LinearRegression().fit(X[keep], y[keep])
+        brute_force[i] = y[i] - regression.predict(X[i:i + 1])[0]
+
+    assert np.allclose(loo_residuals, brute_force)
+    assert np.isclose(press, np.sum(brute_force**2))
+    assert np.isclose(predicted_r2, 1 - np.sum(brute_force**2) / np.sum((y - y.mean())**2))
+
+def test_calculate_leverage():
+    """Test the chunked leverage against the diagonal of the full hat matrix (with the intercept column)."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(50, 2))
+    design = np.hstack([np.ones((50, 1)), X])
+    hat_matrix = design @ np.linalg.inv(design.T @ design) @ design.T
+    assert np.allclose(calculate_leverage(X, chunk_size=7), np.diagonal(hat_matrix))
+
+def test_cooks_distance():
+    """Test Cook's distance from residuals and chunked leverage (parameter count from the leverage) against statsmodels."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, 2))
+    y = X @ np.array([1.0, -0.5]) + rng.normal(size=60)
+    residuals = y - LinearRegression().fit(X, y).predict(X)
+    expected = sm.OLS(y, sm.add_constant(X)).fit().get_influence().cooks_distance[0]
+    assert np.allclose(cooks_distance(residuals, calculate_leverage(X)), expected)
+    assert np.allclose(cooks_distance(residuals, calculate_leverage(X), n_params=3), expected)
+
+def test_polynomial_degree_sweep():
+    """Test the incremental degree sweep against refitting statsmodels OLS on PolynomialFeatures at every degree."""
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 10, size=80)
+    y = 0.5 * x**2 - x + rng.normal(size=80)
+    summary, cooks = polynomial_degree_sweep(x, y, max_degree=4)
+
+    for degree in range(1, 5):
+        features = PolynomialFeatures(degree).fit_transform(x.reshape(-1, 1))
+        fit = sm.OLS(y, features).fit()
+        assert np.isclose(summary.loc[degree, 'rss'], fit.ssr)
+        assert np.isclose(summary.loc[degree, 'aic'], fit.aic)
+        assert np.isclose(summary.loc[degree, 'bic'], fit.bic)
+        assert np.allclose(cooks[degree - 1], fit.get_influence().cooks_distance[0])
+
+def test_robust_fit():
+    """Test the Huber and Tukey IRLS fits against statsmodels RLM on heavy-tailed data."""
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(400, 2))
+    y = 0.3 + X @ np.array([1.0, -2.0]) + rng.standard_t(2, size=400)
+    for method, norm in [('huber', sm.robust.norms.HuberT()), ('tukey', sm.robust.norms.TukeyBiweight())]:
+        intercept, coef, weights = robust_fit(X, y, method=method, tol=1e-12, max_iter=200)
+        expected = sm.RLM(y, sm.add_constant(X), M=norm).fit(tol=1e-12, maxiter=200)
+        assert np.allclose(np.r_[intercept, coef], expected.params, atol=1e-5)
+        assert np.allclose(weights, expected.weights, atol=1e-4)
+
+        # Cook's distance of the robust fit: OLS influence on the rows scaled by sqrt(w)
+        influence = Influence(X, y, weights=weights)
+        scaled = sm.OLS(y * np.sqrt(weights), sm.add_constant(X) * np.sqrt(weights)[:, None]).fit()
+        assert np.allclose(influence.params, np.r_[intercept, coef])
+        assert np.allclose(influence.cooks_distance, scaled.get_influence().cooks_distance[0])
+
+def test_robust_standard_errors():
+    """Test HC0-HC3 from the two-pass chunked sandwich (leverage computed in the second pass) against statsmodels."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 2))
+    y = X @ np.array([1.0, -1.0]) + rng.normal(size=120) * (1 + np.abs(X[:, 0]))
+    fit = sm.OLS(y, sm.add_constant(X)).fit()
+    standard_errors = robust_standard_errors(X, fit.resid, chunk_size=25)
+
+    sandwich = OnlineRobustCovariance()
+    for start in range(0, 120, 25):
+        sandwich.accumulate_gram(X[start:start + 25])
+    for start in range(0, 120, 25):
+        sandwich.update(fit.resid[start:start + 25], X[start:start + 25])
+
+    for kind in ['HC0', 'HC1', 'HC2', 'HC3']:
+        expected = getattr(fit, f'{kind}_se')
+        assert np.allclose(standard_errors[kind], expected)
+        assert np.allclose(sandwich.standard_errors(kind), expected)
+
+def test_bootstrap_diagnostics():
+    """Test that the bootstrap quantiles do not depend on the number of workers and that the shared memory is released."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, 1))
+    y = 2 * X[:, 0] + rng.normal(size=40)
+    shared_before = set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+    single = bootstrap_diagnostics(X, y, n_boot=30, n_workers=1, batch_size=7)
+    several = bootstrap_diagnostics(X, y, n_boot=30, n_workers=3, batch_size=7)
+    pd.testing.assert_frame_equal(single, several)
+    assert np.all(single['durbin_watson'].between(0, 4)) and np.all(single['breusch_pagan_p'].between(0, 1))
+    if os.path.isdir('/dev/shm'):
+        assert set(os.listdir('/dev/shm')) <= shared_before
+
+def test_online_breusch_pagan_durbin_watson():
+    """Test the online Breusch-Pagan (Koenker and original) and Durbin-Watson accumulators, fed in uneven batches, against statsmodels on the concatenated data."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 2))
+    residuals = rng.normal(size=200) * (1 + np.abs(X[:, 0]))
+    batches = np.split(np.arange(200), [1, 37, 38, 120])
+
+    durbin_watson_online = OnlineDurbinWatson()
+    for batch in batches:
+        durbin_watson_online.update(residuals[batch])
+    assert np.isclose(durbin_watson_online.statistic(), durbin_watson(residuals))
+
+    for robust in [True, False]:
+        breusch_pagan_online = OnlineBreuschPagan(robust=robust)
+        for batch in batches:
+            breusch_pagan_online.update(residuals[batch], X[batch])
+        expected = het_breuschpagan(residuals, sm.add_constant(X), robust=robust)
+        assert np.allclose(breusch_pagan_online.result(), expected)
+
+
+def main(robust=None):
     X_train,X_test,y_train,y_test, X, y = preprocess()
-    residuals_test, y_pred_test, residuals_full, y_pred_full = linReg(X_train,X_test,y_train,y_test, X, y)
+    residuals_test, y_pred_test, residuals_full, y_pred_full, weights = linReg(X_train,X_test,y_train,y_test, X, y, robust=robust, return_weights=True)
     residual_plot(residuals_test, y_pred_test)
-    leverage = calculate_leverage(X)
-    cooks_distances = cooks_distance(residuals_full, leverage)
-    visualize_cooks_distance(cooks_distances)
+    # with a robust fit, Cook's distance comes from the same fit (the training rows with their final IRLS weights)
+    if robust is None:
+        influence = Influence(X, y)
+    else:
+        influence = Influence(X_train, y_train, weights=weights)
+    visualize_cooks_distance(influence.cooks_distance)
     Breusch_Pagan(residuals_test, X_test)
     Durbin_Watson(residuals_test)
 
@@ -0,0 +1,51 @@
+# Startup and per-rerun latency benchmark for the two-way ANOVA Streamlit app,
+# and throughput of the synthetic data generator used for load testing.
+# Run from the repository root with `python two-way-anova-benchmark.py`.
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from two_way_anova import write_bunker_data
+
+# Time to import a module in a fresh interpreter, so nothing is already cached in sys.modules
+def cold_import_seconds(module):
+    code = f'import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)'
+    return float(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout)
+
+# Cold start of the app (first run renders the homepage), then every page twice:
+# the first visit pays for any analysis that page needs, the second visit should only render
+def app_rerun_seconds(path='two-way-anova-test.py', pages=range(16)):
+    app = AppTest.from_file(path, default_timeout=120)
+    start = time.perf_counter()
+    app.run()
+    rows = [{'page': 'cold start', 'first_visit': time.perf_counter() - start, 'second_visit': None}]
+    for page in pages:
+        timings = []
+        for _ in range(2):
+            app.session_state.page = page
+            start = time.perf_counter()
+            app.run()
+            timings.append(time.perf_counter() - start)
+        rows.append({'page': page, 'first_visit': timings[0], 'second_visit': timings[1]})
+    return pd.DataFrame(rows).set_index('page')
+
+# Time to stream n_rows of synthetic bunker data to disk in each format
+def generation_seconds(n_rows=5_000_000, formats=('csv', 'npy')):
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for format in formats:
+            start = time.perf_counter()
+            write_bunker_data(os.path.join(directory, f'bunker.{format}'), n_rows, format=format)
+            elapsed = time.perf_counter() - start
+            rows.append({'format': format, 'seconds': elapsed, 'rows_per_second': n_rows / elapsed})
+    return pd.DataFrame(rows).set_index('format')
+
+if __name__ == '__main__':
+    print(f"Cold import of two_way_anova: {cold_import_seconds('two_way_anova'):.3f} s")
+    print(app_rerun_seconds())
+    print(generation_seconds())
@@ -1,133 +1,29 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-
-#########     SCRIPT    #########
-# Use the updated dataset from the previous results
-updated_df = pd.DataFrame({
-    'Substances': ['Garlic Powder']*11 + ['Silver']*11 + ['None']*14,
-    'Religious_Iconography': ['Crosses']*6 + ['No Crosses']*5 + ['Crosses']*6 + ['No Crosses']*5 + ['Crosses']*6 + ['No Crosses']*8,
-    'Noise_Level': [50.00, 52.48, 49.31, 53.24, 57.62, 48.83, 65.00, 63.83, 72.90, 68.84, 62.65,
-                    55.00, 52.68, 52.67, 56.21, 45.43, 46.38, 70.00, 67.19, 64.94, 71.57, 65.46,
-                    60.00, 67.33, 58.87, 60.34, 52.88, 57.28, 75.00, 75.55, 69.25, 76.88, 72.00, 73.54, 67.71, 68.49]
-})
-
-# Set random seed for reproducibility
-np.random.seed(42)
-
-# Function to generate new noise levels
-def generate_noise_levels(mean, std_dev, size):
-    return np.round(np.random.normal(loc=mean, scale=std_dev, size=size), 2)
-
-# Generate additional data for each combination
-substances = ['Garlic Powder', 'Silver', 'None']
-iconography_list = ['Crosses', 'No Crosses']
-new_data = []
-for substance in substances:
-    for iconography in iconography_list:
-        subset = updated_df[(updated_df['Substances'] == substance) & (updated_df['Religious_Iconography'] == iconography)]
-        mean_noise = subset['Noise_Level'].mean()
-        new_noise = generate_noise_levels(mean_noise, 5, 200)  # Generate 200 new values for each combination
-        new_data.extend([(substance, iconography, noise) for noise in new_noise])
-
-# Create a new dataframe with the additional data
-additional_df = pd.DataFrame(new_data, columns=['Substances', 'Religious_Iconography', 'Noise_Level'])
-
-# Combine the original and new data
-final_df = pd.concat([updated_df, additional_df], ignore_index=True)
-
-# Display summary statistics of the final dataset
-print(final_df.groupby(['Substances', 'Religious_Iconography'])['Noise_Level'].describe())
-
-# Display the total number of samples
-print(f"\nTotal number of samples: {len(final_df)}")
-
-# Display the grand mean
-grand_mean = final_df['Noise_Level'].mean()
-print(f"\nGrand mean: {grand_mean}\n")
-
-# Create interaction plot
-plt.figure(figsize=(10, 6))
-sns.boxplot(x='Substances', y='Noise_Level', hue='Religious_Iconography', data=final_df)
-plt.title('Interaction Plot: Substances and Religious Iconography')
-plt.ylabel('Noise Level (dB)')
-plt.show()
-
-# Calculate SS for Substances
-ss_substances = sum([(group['Noise_Level'].mean() - grand_mean)**2 * len(group) 
-                     for name, group in final_df.groupby('Substances')])
-
-# Calculate SS for Religious Iconography
-ss_iconography = sum([(group['Noise_Level'].mean() - grand_mean)**2 * len(group) 
-                      for name, group in final_df.groupby('Religious_Iconography')])
-
-# Calculate Group Means
-group_means_df = final_df.groupby(['Substances', 'Religious_Iconography']).mean()
-ss_between = sum([(group['Noise_Level'].mean() - grand_mean)**2 * len(group)
-                      for name, group in final_df.groupby(['Substances', 'Religious_Iconography'])])
-
-# Calculate SS for Interaction
-ss_interaction = ss_between - (ss_substances + ss_iconography)
-
-# Calculate SS Total and SS Error
-ss_total = sum((final_df['Noise_Level'] - grand_mean)**2)
-ss_error = ss_total - (ss_substances + ss_iconography + ss_interaction)
-
-# Calculate degrees of freedom
-df_substances = 2  # 3 levels - 1
-df_iconography = 1  # 2 levels - 1
-df_interaction = 2  # (3-1) * (2-1)
-df_error = len(final_df) - (3 * 2)  # total samples - (levels of A * levels of B)
-
-# Calculate Mean Squares
-ms_substances = ss_substances / df_substances
-ms_iconography = ss_iconography / df_iconography
-ms_interaction = ss_interaction / df_interaction
-ms_error = ss_error / df_error
-
-# Calculate F-statistics
-f_substances = ms_substances / ms_error
-f_iconography = ms_iconography / ms_error
-f_interaction = ms_interaction / ms_error
-
-# Calculate p-values (Pr(>F))
-p_substances = stats.f.sf(f_substances, df_substances, df_error)
-p_iconography = stats.f.sf(f_iconography, df_iconography, df_error)
-p_interaction = stats.f.sf(f_interaction, df_interaction, df_error)
-
-# Create the ANOVA table
-anova_df = pd.DataFrame({
-    'source': ['Substances', 'Religious_Iconography', 'Interaction', 'Residual'],
-    'sum_sq': [ss_substances, ss_iconography, ss_interaction, ss_error],
-    'df': [df_substances, df_iconography, df_interaction, df_error],
-    'mean_sq': [ms_substances, ms_iconography, ms_interaction, ms_error],
-    'F': [f_substances, f_iconography, f_interaction, None],
-    'Pr(>F)': [p_substances, p_iconography, p_interaction, None],
-}).set_index('source')
-
-# Print the 2-way ANOVA table
-print(anova_df)
-
-# Print interpretations
-print("\nInterpretations:")
-print("1. Main effect of Substances:", "Significant" if anova_df.loc['Substances', 'Pr(>F)'] < 0.05 else "Not significant")
-print("2. Main effect of Religious Iconography:", "Significant" if anova_df.loc['Religious_Iconography', 'Pr(>F)'] < 0.05 else "Not significant")
-print("3. Interaction effect:", "Significant" if anova_df.loc['Interaction', 'Pr(>F)'] < 0.05 else "Not significant")
-
-# Save the final dataset to a CSV file
-final_df.to_csv('apocalypse_bunker_data.csv', index=False)
-print("\nDataset saved as 'apocalypse_bunker_data.csv'")
-
-
 ######### STREAMLIT APP #########
-import plotly.express as px
+# Run with `streamlit run two-way-anova-test.py`; running it with plain python runs the console analysis instead.
+# The analysis lives in two_way_anova.py; this file only renders it.
+import inspect
 import streamlit as st
 from streamlit.runtime.scriptrunner import get_script_run_ctx
+from two_way_anova import AnovaPipeline, anova, anova_table, build_final_df, encode_factors, iconography_list, run_script, substances
 
 ctx = get_script_run_ctx()
 
+# One lazy pipeline per dataset, shared by every rerun and session. Results are computed the first time a scene needs them.
+@st.cache_resource
+def load_pipeline(seed=42):
+    return AnovaPipeline(seed)
+
+# The CSV is written once per dataset, keyed on its content hash
+@st.cache_resource
+def save_dataset(data_hash, _final_df):
+    _final_df.to_csv('apocalypse_bunker_data.csv', index=False)
+    return 'apocalypse_bunker_data.csv'
+
+def dataset():
+    pipeline = load_pipeline()
+    save_dataset(pipeline.data_hash, pipeline.final_df)
+    return pipeline
+
 def prevpage(): st.session_state.page -= 1
 
 def nextpage(): st.session_state.page += 1
@@ -290,6 +186,9 @@ def scene10():
              ''')
     
 def scene11():
+    pipeline = dataset()
+    final_df = pipeline.final_df
+    _, group_means_df, _ = pipeline.summary
     st.write('''#### Exploring the Data''')
     st.code('''
 final_df.head()
@@ -304,21 +203,25 @@ final_df.head()
 def scene12():
     st.write('''#### Testing normality''')
     st.write('''We need to check that the distribution is normal from each group (i.e. each bunker). We'll validate this visually as well as using the Anderson-Darling Test.''')
+    import plotly.express as px
     tabs = st.tabs([f'({substance}, {iconography})' for substance in substances for iconography in iconography_list])
+    normality = dataset().normality
     i = 0
     for substance in substances:
         for iconography in iconography_list: 
             with tabs[i]:
-                group_df = final_df[(final_df['Substances'] == substance) & (final_df['Religious_Iconography'] == iconography)]
-                fig = px.histogram(group_df, x='Noise_Level')
+                # the histogram is binned once and cached, so only the bin counts are sent to the browser
+                centers, counts, result = normality[(substance, iconography)]
+                fig = px.bar(x=centers, y=counts, labels={'x': 'Noise_Level', 'y': 'count'})
+                fig.update_layout(bargap=0)
                 st.plotly_chart(fig, theme='streamlit')
                 st.code(f'''
 from scipy import stats
 
-group_df = final_df[(final_df['Substances'] == '{substance}') & (final_df['Religious_Iconography'] == '{iconography}')]
-stats.anderson(group_df['Noise_Level'])
+# rows are grouped by cell once; each cell is a zero-copy slice
+grouped = GroupedData(final_df, 'Noise_Level', ['Substances', 'Religious_Iconography'])
+stats.anderson(grouped.cell('{substance}', '{iconography}'))
                 ''', language='python')
-                result = stats.anderson(group_df['Noise_Level'])
                 st.write(f'''{result}''')
                 i += 1
     
@@ -327,22 +230,15 @@ def scene13():
              #### Testing homogeneity of variance
              ''')
     st.write('''We need to check that the variance from each group (i.e. each bunker) is homogeneous. We'll use Levene's Test.''')
-    groups = []
-    for substance in substances:
-        for iconography in iconography_list:
-            group_df = final_df[(final_df['Substances'] == substance) & (final_df['Religious_Iconography'] == iconography)]
-            groups.append(group_df['Noise_Level'])
-    result = stats.levene(groups[0], groups[1], groups[2], groups[3], groups[4], groups[5])
+    result = dataset().levene
     st.code('''
-for substance in substances:
-    for iconography in iconography_list:
-        group_df = final_df[(final_df['Substances'] == substance) & (final_df['Religious_Iconography'] == iconography)]
-        groups.append(group_df['Noise_Level'])
-stats.levene(groups[0], groups[1], groups[2], groups[3], groups[4], groups[5])
+groups = [grouped.cell(substance, iconography) for substance in substances for iconography in iconography_list]
+stats.levene(*groups)
 ''', language='python')
     st.write(f'''{result}''')
 
 def scene14():
+    grand_mean, group_means_df, anova_df = dataset().summary
     st.write('''
              #### Two-Way ANOVA Test
 
@@ -359,58 +255,8 @@ final_df['Noise_Level'].mean()
     st.write('''
             ##### Producing the ANOVA table
             ''')
-    st.code('''
-# Calculate SS for Substances
-ss_substances = sum([(group['Noise_Level'].mean() - grand_mean)**2 * len(group) 
-                     for name, group in final_df.groupby('Substances')])
-
-# Calculate SS for Religious Iconography
-ss_iconography = sum([(group['Noise_Level'].mean() - grand_mean)**2 * len(group) 
-                      for name, group in final_df.groupby('Religious_Iconography')])
-
-# Calculate Group Means
-group_means_df = final_df.groupby(['Substances', 'Religious_Iconography']).mean()
-ss_between = sum([(group['Noise_Level'].mean() - grand_mean)**2 * len(group)
-                      for name, group in final_df.groupby(['Substances', 'Religious_Iconography'])])
-
-# Calculate SS for Interaction
-ss_interaction = ss_between - (ss_substances + ss_iconography)
-
-# Calculate SS Total and SS Error
-ss_total = sum((final_df['Noise_Level'] - grand_mean)**2)
-ss_error = ss_total - (ss_substances + ss_iconography + ss_interaction)
-
-# Calculate degrees of freedom
-df_substances = 2  # 3 levels - 1
-df_iconography = 1  # 2 levels - 1
-df_interaction = 2  # (3-1) * (2-1)
-df_error = len(final_df) - (3 * 2)  # total samples - (levels of A * levels of B)
-
-# Calculate Mean Squares
-ms_substances = ss_substances / df_substances
-ms_iconography = ss_iconography / df_iconography
-ms_interaction = ss_interaction / df_interaction
-ms_error = ss_error / df_error
-
-# Calculate F-statistics
-f_substances = ms_substances / ms_error
-f_iconography = ms_iconography / ms_error
-f_interaction = ms_interaction / ms_error
-
-# Calculate p-values (Pr(>F))
-p_substances = stats.f.sf(f_substances, df_substances, df_error)
-p_iconography = stats.f.sf(f_iconography, df_iconography, df_error)
-p_interaction = stats.f.sf(f_interaction, df_interaction, df_error)
-
-# Create the ANOVA table
-anova_df = pd.DataFrame({
-    'source': ['Substances', 'Religious_Iconography', 'Interaction', 'Residual'],
-    'sum_sq': [ss_substances, ss_iconography, ss_interaction, ss_error],
-    'df': [df_substances, df_iconography, df_interaction, df_error],
-    'mean_sq': [ms_substances, ms_iconography, ms_interaction, ms_error],
-    'F': [f_substances, f_iconography, f_interaction, None],
-    'Pr(>F)': [p_substances, p_iconography, p_interaction, None],
-}).set_index('source')
+    st.code(inspect.getsource(encode_factors) + '\n' + inspect.getsource(anova) + '\n' + inspect.getsource(anova_table) + '''
+anova_df = anova(final_df, 'Noise_Level', ['Substances', 'Religious_Iconography'])
 
 # Print the 2-way ANOVA table
 print(anova_df)
@@ -434,7 +280,16 @@ def scene15():
              ![](https://preview.redd.it/ss3dlqgtfgq71.jpg?width=640&crop=smart&auto=webp&s=85756c17519cffd04d7e807144ad6abcbd3ddb8a)
              ''')
 
-if ctx is not None:
+    with st.expander("Fine, here's the post-hoc test (Tukey HSD)"):
+        substances_tukey, cells_tukey = dataset().tukey
+        st.write("Substances:")
+        st.dataframe(substances_tukey)
+        st.write("Every substance and iconography combination:")
+        st.dataframe(cells_tukey)
+
+if ctx is None and __name__ == '__main__':
+    run_script(build_final_df())
+else:
     # Page navigation reference: https://discuss.streamlit.io/t/how-to-clear-screen-make-blank-again/30971/2
     if 'page' not in st.session_state:
         st.session_state.page = 0
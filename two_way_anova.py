@@ -0,0 +1,682 @@
+# Two-way ANOVA analysis for the apocalypse bunker data.
+# Importing this module has no side effects: the data is generated, analyzed and saved only when asked for,
+# either through the lazy AnovaPipeline (used by the Streamlit app in two-way-anova-test.py) or by running
+# this file as a script. scipy is imported inside the functions that use it, so importing the module stays cheap.
+import pandas as pd
+import numpy as np
+from itertools import combinations, product
+from functools import cached_property, lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import os
+import json
+import hashlib
+
+#########  ANOVA ENGINE #########
+# Encode each factor to integer codes once (categorical codes are reused as-is)
+def encode_factors(data, factors):
+    codes, levels = [], []
+    for factor in factors:
+        column = data[factor]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes.append(column.cat.codes.to_numpy())
+            levels.append(column.cat.categories)
+        else:
+            factor_codes, factor_levels = pd.factorize(column)
+            codes.append(factor_codes)
+            levels.append(factor_levels)
+    return codes, levels
+
+# Factor codes, factor levels and response values of the complete rows. Rows with a missing factor level
+# (code -1) or a missing response are dropped, as groupby and statsmodels' anova_lm do.
+def complete_rows(data, response, factors):
+    codes, levels = encode_factors(data, factors)
+    y = data[response].to_numpy(dtype=float, na_value=np.nan)
+    complete = ~np.isnan(y)
+    for factor_codes in codes:
+        complete &= factor_codes >= 0
+    if not complete.all():
+        codes = [factor_codes[complete] for factor_codes in codes]
+        y = y[complete]
+    return codes, levels, y
+
+# N-way ANOVA table for any number of factor columns.
+# The cell counts and sums come from one np.bincount over the combined codes.
+def anova(data, response, factors):
+    codes, levels, y = complete_rows(data, response, factors)
+    y_centered = y - y.mean()
+
+    shape = [len(factor_levels) for factor_levels in levels]
+    cell = np.ravel_multi_index(codes, shape)
+    cell_counts = np.bincount(cell, minlength=int(np.prod(shape))).reshape(shape)
+    cell_sums = np.bincount(cell, weights=y_centered, minlength=cell_counts.size).reshape(shape)
+    return anova_table(cell_counts, cell_sums, np.sum(y_centered**2), factors)
+
+# ANOVA table from the cell counts and the cell sums of the response centered on the grand mean
+# (arrays with one axis per factor). The residual df is n minus the number of non-empty cells.
+def anova_table(cell_counts, cell_sums, ss_total, factors):
+    from scipy import stats
+    ss, ss_between = effect_sums_of_squares(cell_counts, cell_sums)
+    df = effect_degrees_of_freedom(cell_counts)
+    ss_error = ss_total - ss_between
+    df_error = int(cell_counts.sum()) - np.count_nonzero(cell_counts)
+    ms_error = ss_error / df_error
+
+    rows = []
+    for term in ss:
+        source = effect_name(factors, term)
+        mean_sq = ss[term] / df[term]
+        f_value = mean_sq / ms_error
+        rows.append((source, ss[term], df[term], mean_sq, f_value, stats.f.sf(f_value, df[term], df_error)))
+    rows.append(('Residual', ss_error, df_error, ms_error, None, None))
+    return pd.DataFrame(rows, columns=['source', 'sum_sq', 'df', 'mean_sq', 'F', 'Pr(>F)']).set_index('source')
+
+# Orthonormal basis of every effect (keyed by the tuple of factor axes in the term) over the non-empty cells,
+# for sequential (Type I) sums of squares, as in statsmodels' anova_lm. The model is fitted on the cell table:
+# each term's columns are the Kronecker product of dummy contrasts of its factors, with rows weighted by
+# sqrt(cell count). Terms are added in order (main effects, then two-way interactions, ...) and each term's
+# columns are projected off the terms before it; the SVD keeps only new directions, so the number of columns
+# (the effect's df) is right even with empty cells. The intercept's basis is under the empty term ().
+# The work depends only on the number of cells, not on the number of rows.
+def effect_bases(cell_counts):
+    counts = cell_counts.ravel()
+    nonempty = counts > 0
+    root = np.sqrt(counts[nonempty])
+    basis = (root / np.linalg.norm(root))[:, None]
+    bases = {(): basis}
+    axes = range(cell_counts.ndim)
+    for order in range(1, cell_counts.ndim + 1):
+        for term in combinations(axes, order):
+            columns = np.ones((1, 1))
+            for i, levels in enumerate(cell_counts.shape):
+                columns = np.kron(columns, np.eye(levels)[:, 1:] if i in term else np.ones((levels, 1)))
+            block = columns[nonempty] * root[:, None]
+            tolerance = 1e-9 * np.linalg.norm(block, axis=0).max(initial=0)
+            # projected twice (Gram-Schmidt with reorthogonalization) so the bases stay orthogonal
+            block -= basis @ (basis.T @ block)
+            block -= basis @ (basis.T @ block)
+            u, singular_values, _ = np.linalg.svd(block, full_matrices=False)
+            bases[term] = u[:, singular_values > tolerance]
+            basis = np.hstack([basis, bases[term]])
+    return bases
+
+# Sequential (Type I) sum of squares of every effect and the between-cells SS, from the cell table.
+# With the response centered, the cell sums divided by sqrt(cell count) are the weighted cell means, and each
+# effect's SS is the squared length of their projection on its basis. cell_sums may carry extra leading axes
+# (e.g. one per permutation); the sums of squares then keep those axes.
+def effect_sums_of_squares(cell_counts, cell_sums):
+    batch = cell_sums.ndim - cell_counts.ndim
+    counts = cell_counts.ravel()
+    nonempty = counts > 0
+    scaled = cell_sums.reshape(cell_sums.shape[:batch] + (-1,))[..., nonempty] / np.sqrt(counts[nonempty])
+    bases = effect_bases(cell_counts)
+    ss = {term: np.sum((scaled @ basis)**2, axis=-1) for term, basis in bases.items() if term}
+    ss_between = np.sum(scaled**2, axis=-1) - (scaled @ bases[()])[..., 0]**2
+    return ss, ss_between
+
+# Row label of an effect: the factor name, 'Interaction' for the two-way interaction, or 'A:B:C' otherwise
+def effect_name(factors, term):
+    if len(factors) == 2 and len(term) == 2:
+        return 'Interaction'
+    return ':'.join(factors[i] for i in term)
+
+# Degrees of freedom of every effect: the number of new directions it adds to the sequential fit
+# (the product of (levels - 1) over the factors in the term when no cell is empty)
+def effect_degrees_of_freedom(cell_counts):
+    return {term: basis.shape[1] for term, basis in effect_bases(cell_counts).items() if term}
+
+# Response values sorted by design cell, with the offset where each cell starts, built once per dataset in O(n)
+# (cell codes are small integers, so the stable argsort is a radix sort). Every cell's values are then a
+# zero-copy slice, and the cell counts, sums and means come from the offsets without scanning the rows again.
+class GroupedData:
+    def __init__(self, data, response, factors):
+        self.response = response
+        self.factors = list(factors)
+        codes, self.levels, y = complete_rows(data, response, factors)
+        self.shape = [len(factor_levels) for factor_levels in self.levels]
+        n_cells = int(np.prod(self.shape))
+        cell = np.ravel_multi_index(codes, self.shape)
+        if n_cells <= np.iinfo(np.uint16).max:
+            cell = cell.astype(np.uint16)
+        self.values = y[np.argsort(cell, kind='stable')]
+        self.counts = np.bincount(cell, minlength=n_cells)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)])
+
+    # Flat index of the cell with these factor levels (one label per factor)
+    def cell_index(self, *labels):
+        return int(np.ravel_multi_index([factor_levels.get_loc(label) for factor_levels, label in zip(self.levels, labels)], self.shape))
+
+    # Zero-copy view of one cell's response values
+    def cell(self, *labels):
+        i = self.cell_index(*labels)
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    @cached_property
+    def grand_mean(self):
+        return self.values.mean()
+
+    @cached_property
+    def sums(self):
+        sums = np.zeros(len(self.counts))
+        nonempty = self.counts > 0
+        sums[nonempty] = np.add.reduceat(self.values, self.offsets[:-1][nonempty])
+        return sums
+
+    @cached_property
+    def means(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.sums / self.counts
+
+    # Sum of squared deviations from the cell mean, per cell
+    @cached_property
+    def sums_of_squares(self):
+        nonempty = self.counts > 0
+        deviations = self.values - np.repeat(self.means[nonempty], self.counts[nonempty])
+        sums_of_squares = np.zeros(len(self.counts))
+        sums_of_squares[nonempty] = np.add.reduceat(deviations**2, self.offsets[:-1][nonempty])
+        return sums_of_squares
+
+    # Cell means as a DataFrame, laid out like data.groupby(factors)[[response]].mean()
+    def means_frame(self):
+        index = pd.MultiIndex.from_product(self.levels, names=self.factors)
+        frame = pd.DataFrame({self.response: self.means}, index=index)
+        return frame[self.counts > 0].sort_index()
+
+    def anova(self):
+        cell_sums = self.sums - self.counts * self.grand_mean
+        ss_total = np.sum((self.values - self.grand_mean)**2)
+        return anova_table(self.counts.reshape(self.shape), cell_sums.reshape(self.shape), ss_total, self.factors)
+
+# Permutation test state for the worker processes, set once per process by the pool initializer
+_permutation_state = {}
+
+def _permutation_init(values, counts, shape):
+    _permutation_state.update(values=values, counts=counts, shape=shape)
+
+# F statistics of every effect for one block of random permutations of the response.
+# The rows of the (block_size, n) permuted matrix are summed per cell with one np.add.reduceat, so the whole
+# block is scored with array operations. The total SS does not change under permutation, so it is reused.
+def _permutation_block(seed_seq, block_size):
+    values, counts, shape = _permutation_state['values'], _permutation_state['counts'], _permutation_state['shape']
+    rng = np.random.default_rng(seed_seq)
+    permuted = rng.permuted(np.broadcast_to(values, (block_size, len(values))), axis=1)
+    nonempty = counts > 0
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+    cell_sums = np.zeros((block_size, len(counts)))
+    cell_sums[:, nonempty] = np.add.reduceat(permuted, starts, axis=1)
+    return effect_f_statistics(counts.reshape(shape), cell_sums.reshape((block_size, *shape)), np.sum(values**2))
+
+# F statistic of every effect from the cell table (cell_sums of the centered response, optionally batched)
+def effect_f_statistics(cell_counts, cell_sums, ss_total):
+    ss, ss_between = effect_sums_of_squares(cell_counts, cell_sums)
+    df = effect_degrees_of_freedom(cell_counts)
+    ms_error = (ss_total - ss_between) / (int(cell_counts.sum()) - np.count_nonzero(cell_counts))
+    return {term: ss[term] / df[term] / ms_error for term in ss}
+
+# Permutation p-values for every effect of the ANOVA on grouped data.
+# The response is shuffled across all rows (the null hypothesis of no effects at all), and F statistics are
+# computed for blocks of permutations at once. Blocks are spread over a process pool, each with its own seed
+# spawned from `seed`, and are combined in order so the result does not depend on the number of workers.
+# After each wave of blocks, the Clopper-Pearson interval of every p-value is checked, and the run stops early
+# once no interval contains alpha.
+# Each block holds a dense (block_size, n) float64 matrix, so by default the block size is derived from a
+# per-worker memory budget (at most 500 permutations per block), which keeps memory bounded for any n.
+def permutation_anova(grouped, n_permutations=10000, block_size=None, n_workers=None, seed=0, alpha=0.05, confidence=0.99, memory_budget=64 * 2**20):
+    from scipy import stats
+    values = grouped.values - grouped.grand_mean
+    shape = tuple(grouped.shape)
+    cell_counts = grouped.counts.reshape(shape)
+    observed = effect_f_statistics(cell_counts, (grouped.sums - grouped.counts * grouped.grand_mean).reshape(shape), np.sum(values**2))
+
+    if block_size is None:
+        block_size = int(max(1, min(500, memory_budget // (8 * len(values)))))
+    n_workers = os.cpu_count() if n_workers is None else n_workers
+    n_blocks = -(-n_permutations // block_size)
+    block_sizes = [min(block_size, n_permutations - i * block_size) for i in range(n_blocks)]
+    seeds = np.random.SeedSequence(seed).spawn(n_blocks)
+    exceed = {term: 0 for term in observed}
+    done = 0
+    stop = False
+
+    def bounds(count, total):
+        low = stats.beta.ppf((1 - confidence) / 2, count, total - count + 1) if count > 0 else 0.0
+        high = stats.beta.ppf(1 - (1 - confidence) / 2, count + 1, total - count) if count < total else 1.0
+        return low, high
+
+    pool = ProcessPoolExecutor(n_workers, initializer=_permutation_init, initargs=(values, grouped.counts, shape)) if n_workers > 1 else None
+    if pool is None:
+        _permutation_init(values, grouped.counts, shape)
+    try:
+        for wave in range(0, n_blocks, n_workers):
+            wave_blocks = range(wave, min(wave + n_workers, n_blocks))
+            if pool is None:
+                results = [_permutation_block(seeds[i], block_sizes[i]) for i in wave_blocks]
+            else:
+                results = list(pool.map(_permutation_block, [seeds[i] for i in wave_blocks], [block_sizes[i] for i in wave_blocks]))
+            # blocks are checked one at a time in order, so the stopping point does not depend on the wave size
+            for i, block in zip(wave_blocks, results):
+                for term in exceed:
+                    exceed[term] += int(np.count_nonzero(block[term] >= observed[term]))
+                done += block_sizes[i]
+                # p-values use the (count + 1) / (n + 1) estimator, which never reports exactly 0
+                stop = all(not (low <= alpha <= high) for low, high in (bounds(exceed[term] + 1, done + 1) for term in exceed))
+                if stop:
+                    break
+            if stop:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    rows = []
+    for term in observed:
+        source = effect_name(grouped.factors, term)
+        low, high = bounds(exceed[term] + 1, done + 1)
+        rows.append((source, float(observed[term]), (exceed[term] + 1) / (done + 1), low, high, done))
+    return pd.DataFrame(rows, columns=['source', 'F', 'perm_p', 'ci_low', 'ci_high', 'n_permutations']).set_index('source')
+
+# Table of P(range of k standard normals <= x) on a fine grid of x, integrated over z with the trapezoidal rule.
+# The range of k standard normals is (almost surely) below 16, so the table stops there.
+@lru_cache(maxsize=8)
+def _normal_range_cdf(k):
+    from scipy import special
+    z = np.linspace(-8.5, 8.5, 1201)
+    x = np.linspace(0, 16, 4001)
+    density = np.exp(-z**2 / 2) / np.sqrt(2 * np.pi)
+    inner = (special.ndtr(z) - special.ndtr(z - x[:, None]))**(k - 1)
+    return x, np.clip(k * (inner * density).sum(axis=1) * (z[1] - z[0]), 0, 1)
+
+# Quantiles of s = sqrt(chi2(df) / df) at Gauss-Legendre nodes on (0, 1) (one row per df), and the node weights.
+# The nodes are squared so they are denser near 0, where the small values of s that drive the upper tail are.
+def _chi_nodes(df, n_nodes=96):
+    from scipy import stats
+    t, weights = np.polynomial.legendre.leggauss(n_nodes)
+    t = (t + 1) / 2
+    s = np.sqrt(stats.chi2.ppf(t**2, df[:, None]) / df[:, None])
+    return s, weights * t
+
+# Round to a number of significant digits (used to share the chi quantiles between nearly equal df)
+def _round_significant(x, digits=4):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = 10.0**(np.floor(np.log10(x)) - digits + 1)
+        return np.round(x / scale) * scale
+
+# Survival function of the studentized range distribution for arrays of q and df.
+# scipy.stats.studentized_range integrates every value separately (about 10 ms each), which is too slow for
+# tens of thousands of pairs. Here the distribution for infinite df is tabulated once per k, and the one with
+# df degrees of freedom is its average over the quantiles of s, so all values are scored with one interpolation.
+def studentized_range_sf(q, k, df, chunk_size=65536):
+    q, df = np.broadcast_arrays(np.asarray(q, dtype=float), np.asarray(df, dtype=float))
+    x, range_cdf = _normal_range_cdf(k)
+    unique_df, inverse = np.unique(_round_significant(df.ravel()), return_inverse=True)
+    s, weights = _chi_nodes(unique_df)
+    q_flat = q.ravel()
+    sf = np.empty(len(q_flat))
+    for start in range(0, len(q_flat), chunk_size):
+        stop = start + chunk_size
+        cdf = np.interp(q_flat[start:stop, None] * s[inverse[start:stop]], x, range_cdf) @ weights
+        sf[start:stop] = 1 - cdf
+    return np.clip(sf, 0, 1).reshape(q.shape)
+
+# Inverse survival function of the studentized range distribution (critical values), for an array of df.
+# The survival function is evaluated on a grid of q once per distinct df and inverted by interpolating log(sf).
+def studentized_range_isf(p, k, df, n_grid=512):
+    df = np.asarray(df, dtype=float)
+    x, range_cdf = _normal_range_cdf(k)
+    unique_df, inverse = np.unique(_round_significant(df.ravel()), return_inverse=True)
+    q_max = 8.0
+    while studentized_range_sf(q_max, k, np.nanmin(unique_df)) > p:
+        q_max *= 2
+    q_grid = np.linspace(0, q_max, n_grid)
+    s, weights = _chi_nodes(unique_df)
+    critical = np.empty(len(unique_df))
+    for row in range(len(unique_df)):
+        sf = np.clip(1 - np.interp(q_grid[:, None] * s[row], x, range_cdf) @ weights, 1e-300, 1)
+        critical[row] = np.interp(np.log(p), np.log(sf[::-1]), q_grid[::-1])
+    return critical[inverse].reshape(df.shape)
+
+# Labels, counts, means and within-group sums of squares of the groups compared by a post-hoc test: the levels
+# of one factor (the cell table summed over the other factors) or, with by=None, every non-empty cell
+def _posthoc_groups(grouped, by):
+    shape = tuple(grouped.shape)
+    counts = grouped.counts.reshape(shape)
+    sums = grouped.sums.reshape(shape)
+    sums_of_squares = grouped.sums_of_squares.reshape(shape)
+    if by is None:
+        labels = np.array([':'.join(map(str, cell)) for cell in product(*grouped.levels)], dtype=object)
+        counts, sums, sums_of_squares = counts.ravel(), sums.ravel(), sums_of_squares.ravel()
+    else:
+        axis = grouped.factors.index(by)
+        others = tuple(i for i in range(len(shape)) if i != axis)
+        labels = np.array(list(grouped.levels[axis]), dtype=object)
+        level_counts, level_sums = counts.sum(axis=others), sums.sum(axis=others)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            level_means = np.expand_dims(level_sums / level_counts, others)
+        # within-cell SS plus the spread of the cell means around the level mean
+        deviations = np.where(counts > 0, grouped.means.reshape(shape) - level_means, 0)
+        sums_of_squares = (sums_of_squares + counts * deviations**2).sum(axis=others)
+        counts, sums = level_counts, level_sums
+    nonempty = counts > 0
+    return labels[nonempty], counts[nonempty], sums[nonempty] / counts[nonempty], sums_of_squares[nonempty]
+
+# Pairwise post-hoc comparisons of the levels of one factor (by) or of every cell (by=None).
+# 'tukey' is the Tukey-Kramer HSD with the residual mean square and df of the ANOVA (anova_df, computed if not
+# given); 'games-howell' uses each group's own variance with Welch df, for unequal variances.
+# Every pair comes from np.triu_indices, so differences, standard errors, studentized-range p-values and
+# confidence intervals are array operations over all pairs at once.
+def posthoc(grouped, by=None, method='tukey', alpha=0.05, anova_df=None):
+    labels, counts, means, sums_of_squares = _posthoc_groups(grouped, by)
+    k = len(counts)
+    first, second = np.triu_indices(k, 1)
+    meandiff = means[second] - means[first]
+
+    if method == 'tukey':
+        if anova_df is None:
+            anova_df = grouped.anova()
+        ms_error = anova_df.loc['Residual', 'mean_sq']
+        se = np.sqrt(ms_error / 2 * (1 / counts[first] + 1 / counts[second]))
+        df = np.full(len(meandiff), float(anova_df.loc['Residual', 'df']))
+    elif method == 'games-howell':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance_of_mean = sums_of_squares / (counts - 1) / counts
+            pooled = variance_of_mean[first] + variance_of_mean[second]
+            se = np.sqrt(pooled / 2)
+            df = pooled**2 / (variance_of_mean[first]**2 / (counts[first] - 1) + variance_of_mean[second]**2 / (counts[second] - 1))
+    else:
+        raise ValueError(f"Unknown post-hoc method: {method}")
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        q = np.abs(meandiff) / se
+    p_adj = studentized_range_sf(q, k, df)
+    margin = studentized_range_isf(alpha, k, df) * se
+    return pd.DataFrame({
+        'group1': labels[first], 'group2': labels[second], 'meandiff': meandiff, 'se': se, 'q': q, 'df': df,
+        'p_adj': p_adj, 'lower': meandiff - margin, 'upper': meandiff + margin, 'reject': p_adj < alpha,
+    })
+
+#########      DATA     #########
+# Use the updated dataset from the previous results
+updated_df = pd.DataFrame({
+    'Substances': ['Garlic Powder']*11 + ['Silver']*11 + ['None']*14,
+    'Religious_Iconography': ['Crosses']*6 + ['No Crosses']*5 + ['Crosses']*6 + ['No Crosses']*5 + ['Crosses']*6 + ['No Crosses']*8,
+    'Noise_Level': [50.00, 52.48, 49.31, 53.24, 57.62, 48.83, 65.00, 63.83, 72.90, 68.84, 62.65,
+                    55.00, 52.68, 52.67, 56.21, 45.43, 46.38, 70.00, 67.19, 64.94, 71.57, 65.46,
+                    60.00, 67.33, 58.87, 60.34, 52.88, 57.28, 75.00, 75.55, 69.25, 76.88, 72.00, 73.54, 67.71, 68.49]
+})
+
+substances = ['Garlic Powder', 'Silver', 'None']
+iconography_list = ['Crosses', 'No Crosses']
+
+# Function to generate new noise levels
+def generate_noise_levels(mean, std_dev, size):
+    return np.round(np.random.normal(loc=mean, scale=std_dev, size=size), 2)
+
+# Mean noise level of every cell of the original data, in (substance, iconography) order
+def cell_noise_means(base_df=updated_df):
+    means = base_df.groupby(['Substances', 'Religious_Iconography'])['Noise_Level'].mean()
+    return means.reindex(pd.MultiIndex.from_product([substances, iconography_list])).to_numpy()
+
+# Bunker data frame from flat cell codes and noise levels, with categorical factor columns
+# (built from the codes, so no Python object is created per row)
+def bunker_frame(cell_codes, noise):
+    substance_codes, iconography_codes = np.divmod(cell_codes, len(iconography_list))
+    return pd.DataFrame({
+        'Substances': pd.Categorical.from_codes(substance_codes, categories=substances),
+        'Religious_Iconography': pd.Categorical.from_codes(iconography_codes, categories=iconography_list),
+        'Noise_Level': noise,
+    })
+
+# Generate additional data for each combination and combine it with the original data
+def build_final_df(seed=42):
+    # Set random seed for reproducibility
+    np.random.seed(seed)
+
+    # Generate 200 new values for each combination, all cells in one call (the same draws, in the same order,
+    # as one call per cell)
+    cell_codes = np.repeat(np.arange(len(substances) * len(iconography_list)), 200)
+    new_noise = generate_noise_levels(cell_noise_means()[cell_codes], 5, len(cell_codes))
+    additional_df = bunker_frame(cell_codes, new_noise)
+
+    # Combine the original and new data
+    original_df = updated_df.astype({'Substances': pd.CategoricalDtype(substances), 'Religious_Iconography': pd.CategoricalDtype(iconography_list)})
+    return pd.concat([original_df, additional_df], ignore_index=True)
+
+# Synthetic bunker data of any size, as data frames of at most chunk_rows rows. The rows are split evenly over the
+# cells and generated cell by cell; every cell draws from its own Generator spawned from `seed`, one vectorized
+# call per chunk, so the values do not depend on chunk_rows and memory does not grow with n_rows.
+def bunker_chunks(n_rows, seed=42, std_dev=5, chunk_rows=1_000_000):
+    means = cell_noise_means()
+    rows_per_cell = np.full(len(means), n_rows // len(means))
+    rows_per_cell[:n_rows % len(means)] += 1
+    generators = [np.random.default_rng(cell_seed) for cell_seed in np.random.SeedSequence(seed).spawn(len(means))]
+    for cell, (mean, cell_rows, rng) in enumerate(zip(means, rows_per_cell, generators)):
+        for start in range(0, cell_rows, chunk_rows):
+            size = min(chunk_rows, cell_rows - start)
+            yield bunker_frame(np.full(size, cell, dtype=np.int8), np.round(rng.normal(mean, std_dev, size), 2))
+
+# Stream n_rows of synthetic bunker data to disk, one chunk at a time.
+# format='csv' appends the chunks to one CSV file. format='npy' writes a directory with one .npy file per
+# column (the factors as int8 codes) through memory maps, plus levels.json with the factor levels.
+def write_bunker_data(path, n_rows, seed=42, std_dev=5, chunk_rows=1_000_000, format='csv'):
+    chunks = bunker_chunks(n_rows, seed, std_dev, chunk_rows)
+    if format == 'csv':
+        with open(path, 'w', newline='') as f:
+            # The header comes from an empty frame, so a file with no rows can still be read back
+            bunker_frame(np.empty(0, dtype=np.int64), np.empty(0)).to_csv(f, index=False)
+            for chunk in chunks:
+                chunk.to_csv(f, header=False, index=False)
+    elif format == 'npy':
+        os.makedirs(path, exist_ok=True)
+        columns = {
+            'Substances': np.lib.format.open_memmap(os.path.join(path, 'Substances.npy'), mode='w+', dtype=np.int8, shape=(n_rows,)),
+            'Religious_Iconography': np.lib.format.open_memmap(os.path.join(path, 'Religious_Iconography.npy'), mode='w+', dtype=np.int8, shape=(n_rows,)),
+            'Noise_Level': np.lib.format.open_memmap(os.path.join(path, 'Noise_Level.npy'), mode='w+', dtype=np.float64, shape=(n_rows,)),
+        }
+        start = 0
+        for chunk in chunks:
+            stop = start + len(chunk)
+            columns['Substances'][start:stop] = chunk['Substances'].cat.codes
+            columns['Religious_Iconography'][start:stop] = chunk['Religious_Iconography'].cat.codes
+            columns['Noise_Level'][start:stop] = chunk['Noise_Level']
+            start = stop
+        for column in columns.values():
+            column.flush()
+        with open(os.path.join(path, 'levels.json'), 'w') as f:
+            json.dump({'Substances': substances, 'Religious_Iconography': iconography_list}, f)
+    else:
+        raise ValueError(f"Unknown format: {format}")
+    return path
+
+# Read bunker data written by write_bunker_data. The .npy columns are memory-mapped, so only the pages
+# that are used are read from disk.
+def read_bunker_data(path, format='csv'):
+    dtypes = {'Substances': pd.CategoricalDtype(substances), 'Religious_Iconography': pd.CategoricalDtype(iconography_list), 'Noise_Level': float}
+    if format == 'csv':
+        # keep_default_na=False so the 'None' substance is not read as a missing value
+        return pd.read_csv(path, dtype=dtypes, keep_default_na=False)
+    elif format == 'npy':
+        with open(os.path.join(path, 'levels.json')) as f:
+            levels = json.load(f)
+        columns = {}
+        for column in ['Substances', 'Religious_Iconography', 'Noise_Level']:
+            values = np.load(os.path.join(path, f'{column}.npy'), mmap_mode='r')
+            columns[column] = pd.Categorical.from_codes(values, categories=levels[column]) if column in levels else values
+        return pd.DataFrame(columns, copy=False)
+    else:
+        raise ValueError(f"Unknown format: {format}")
+
+# Noise levels grouped by (substance, iconography) cell
+def group_cells(final_df):
+    return GroupedData(final_df, 'Noise_Level', ['Substances', 'Religious_Iconography'])
+
+# Grand mean, group means and the ANOVA table of a dataset
+def summarize(grouped):
+    return grouped.grand_mean, grouped.means_frame(), grouped.anova()
+
+# Lazy analysis pipeline for one dataset. Nothing is computed until it is first used,
+# and every result is computed only once.
+class AnovaPipeline:
+    def __init__(self, seed=42):
+        self.seed = seed
+
+    @cached_property
+    def final_df(self):
+        return build_final_df(self.seed)
+
+    @cached_property
+    def data_hash(self):
+        return hashlib.sha256(pd.util.hash_pandas_object(self.final_df, index=False).to_numpy().tobytes()).hexdigest()
+
+    @cached_property
+    def grouped(self):
+        return group_cells(self.final_df)
+
+    # (grand_mean, group_means_df, anova_df)
+    @cached_property
+    def summary(self):
+        return summarize(self.grouped)
+
+    # Binned histogram and Anderson-Darling result of every cell
+    @cached_property
+    def normality(self):
+        from scipy import stats
+        results = {}
+        for substance in substances:
+            for iconography in iconography_list:
+                noise = self.grouped.cell(substance, iconography)
+                counts, edges = np.histogram(noise, bins='auto')
+                results[(substance, iconography)] = ((edges[:-1] + edges[1:]) / 2, counts, str(stats.anderson(noise)))
+        return results
+
+    # Levene's test across all cells
+    @cached_property
+    def levene(self):
+        from scipy import stats
+        groups = [self.grouped.cell(substance, iconography) for substance in substances for iconography in iconography_list]
+        return str(stats.levene(*groups))
+
+    # Tukey HSD across the substances and across every cell, reusing the MSE of the ANOVA table
+    @cached_property
+    def tukey(self):
+        anova_df = self.summary[2]
+        return posthoc(self.grouped, by='Substances', anova_df=anova_df), posthoc(self.grouped, anova_df=anova_df)
+
+#########     TESTS     #########
+# Test Functions
+def test_anova_unbalanced_three_factors():
+    """Test the N-way ANOVA table on an unbalanced 3-factor design against statsmodels' sequential (Type I) anova_lm."""
+    import statsmodels.formula.api as smf
+    from statsmodels.stats.anova import anova_lm
+    rng = np.random.default_rng(3)
+    data = pd.DataFrame({'a': rng.choice(['p', 'q', 'r'], 300, p=[0.5, 0.3, 0.2]),
+                         'b': rng.choice(['x', 'y'], 300, p=[0.7, 0.3]),
+                         'c': rng.choice(['u', 'v', 'w', 'z'], 300)})
+    data['y'] = rng.normal(size=300) + 0.5 * (data['a'] == 'q') + 0.8 * (data['b'] == 'x') * (data['c'] == 'u')
+    table = anova(data, 'y', ['a', 'b', 'c'])
+    expected = anova_lm(smf.ols('y ~ C(a) * C(b) * C(c)', data).fit(), typ=1)
+    assert np.allclose(table['sum_sq'], expected['sum_sq'])
+    assert np.allclose(table['df'], expected['df'])
+    assert np.allclose(table['F'].iloc[:-1].astype(float), expected['F'].iloc[:-1])
+    assert np.allclose(table['Pr(>F)'].iloc[:-1].astype(float), expected['PR(>F)'].iloc[:-1])
+
+def test_anova_missing_values():
+    """Test that rows with a missing factor level or response are dropped, as in statsmodels' anova_lm."""
+    import statsmodels.formula.api as smf
+    from statsmodels.stats.anova import anova_lm
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame({'a': rng.choice(['p', 'q', 'r'], 120), 'b': rng.choice(['x', 'y'], 120), 'y': rng.normal(size=120)})
+    data.loc[[3, 50], 'a'] = None
+    data.loc[7, 'b'] = None
+    data.loc[[10, 90], 'y'] = np.nan
+    data['b'] = data['b'].astype('category')
+    expected = anova_lm(smf.ols('y ~ C(a) * C(b)', data).fit(), typ=1)
+    for table in [anova(data, 'y', ['a', 'b']), GroupedData(data, 'y', ['a', 'b']).anova()]:
+        assert np.allclose(table['sum_sq'], expected['sum_sq'])
+        assert np.allclose(table['df'], expected['df'])
+
+def test_bunker_data_empty_csv(tmp_path):
+    """Test that a CSV with no rows keeps its header and reads back as an empty frame with the same dtypes."""
+    path = write_bunker_data(tmp_path / 'empty.csv', 0)
+    data = read_bunker_data(path)
+    expected = bunker_frame(np.empty(0, dtype=np.int64), np.empty(0))
+    assert len(data) == 0
+    assert data.dtypes.equals(expected.dtypes)
+
+def test_studentized_range():
+    """Test the vectorized studentized range survival function and critical values against scipy for a few (k, df)."""
+    from scipy import stats
+    q = np.array([0.5, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0])
+    for k, df in [(3, 2.5), (3, 20), (6, 1230), (10, 4), (50, 300)]:
+        assert np.allclose(studentized_range_sf(q, k, df), stats.studentized_range.sf(q, k, df), rtol=1e-3, atol=1e-5)
+        for p in [0.05, 0.01]:
+            assert np.isclose(studentized_range_isf(p, k, df), stats.studentized_range.ppf(1 - p, k, df), rtol=1e-4)
+
+def test_posthoc_tukey():
+    """Test the Tukey HSD over every cell against statsmodels' pairwise_tukeyhsd on the cell labels."""
+    from statsmodels.stats.multicomp import pairwise_tukeyhsd
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'a': rng.choice(['p', 'q', 'r'], 240), 'b': rng.choice(['x', 'y'], 240)})
+    data['y'] = rng.normal(size=240) + 0.6 * (data['a'] == 'q') + 0.4 * (data['b'] == 'y')
+    result = posthoc(GroupedData(data, 'y', ['a', 'b']))
+    expected = pairwise_tukeyhsd(data['y'], data['a'] + ':' + data['b'])
+    groups = expected.groupsunique[np.array(list(combinations(range(len(expected.groupsunique)), 2)))]
+    expected = pd.DataFrame({'meandiff': expected.meandiffs, 'p_adj': expected.pvalues, 'lower': expected.confint[:, 0],
+                             'upper': expected.confint[:, 1]}, index=pd.MultiIndex.from_arrays(groups.T))
+    for row in result.itertuples():
+        # statsmodels orders each pair alphabetically, so the difference may have the opposite sign
+        if (row.group1, row.group2) in expected.index:
+            reference, sign = expected.loc[(row.group1, row.group2)], 1
+        else:
+            reference, sign = expected.loc[(row.group2, row.group1)], -1
+        assert np.isclose(row.meandiff, sign * reference['meandiff'])
+        assert np.isclose(row.p_adj, reference['p_adj'], rtol=1e-3, atol=1e-5)
+        assert np.allclose(sorted([row.lower, row.upper]), sorted([sign * reference['lower'], sign * reference['upper']]), atol=1e-4)
+
+#########     SCRIPT    #########
+def run_script(final_df):
+    # plotting libraries are only needed (and imported) for the console script
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Display summary statistics of the final dataset
+    print(final_df.groupby(['Substances', 'Religious_Iconography'])['Noise_Level'].describe())
+
+    # Display the total number of samples
+    print(f"\nTotal number of samples: {len(final_df)}")
+
+    # Display the grand mean
+    grouped = group_cells(final_df)
+    grand_mean, group_means_df, anova_df = summarize(grouped)
+    print(f"\nGrand mean: {grand_mean}\n")
+
+    # Create interaction plot
+    plt.figure(figsize=(10, 6))
+    sns.boxplot(x='Substances', y='Noise_Level', hue='Religious_Iconography', data=final_df)
+    plt.title('Interaction Plot: Substances and Religious Iconography')
+    plt.ylabel('Noise Level (dB)')
+    plt.show()
+
+    # Print the 2-way ANOVA table
+    print(anova_df)
+
+    # Print interpretations
+    print("\nInterpretations:")
+    print("1. Main effect of Substances:", "Significant" if anova_df.loc['Substances', 'Pr(>F)'] < 0.05 else "Not significant")
+    print("2. Main effect of Religious Iconography:", "Significant" if anova_df.loc['Religious_Iconography', 'Pr(>F)'] < 0.05 else "Not significant")
+    print("3. Interaction effect:", "Significant" if anova_df.loc['Interaction', 'Pr(>F)'] < 0.05 else "Not significant")
+
+    # Permutation p-values, which do not rely on the normality assumption
+    print("\nPermutation test:")
+    print(permutation_anova(grouped))
+
+    # Post-hoc test: which substances and which cells differ
+    print("\nTukey HSD (Substances):")
+    print(posthoc(grouped, by='Substances', anova_df=anova_df))
+    print("\nTukey HSD (Substances x Religious_Iconography):")
+    print(posthoc(grouped, anova_df=anova_df))
+
+    # Save the final dataset to a CSV file
+    final_df.to_csv('apocalypse_bunker_data.csv', index=False)
+    print("\nDataset saved as 'apocalypse_bunker_data.csv'")
+
+if __name__ == '__main__':
+    run_script(build_final_df())